@@ -1,15 +1,21 @@
 import sqlite3
 import mysql.connector
+from mysql.connector import pooling
 import streamlit as st
 import os
 import re
-import time
 import socket
 from datetime import datetime, timedelta
 import json
 import shutil
+import functools
+import hashlib
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 # Fixed import path after move to utils
 from utils.sshtunnel_helper import SSHTunnel
+from database_setup import add_missing_indexes
 
 try:
     from passlib.hash import pbkdf2_sha256
@@ -29,12 +35,105 @@ except ImportError:
 # 4. SSH Tunneling: Securely connects to VPS databases via SSH Port Forwarding.
 # =============================================================================
 
+# --- SQL DIALECT TRANSLATION ---
+@functools.lru_cache(maxsize=256)
+def _mysql_to_sqlite(query):
+    """
+    Rewrites a canonical (MySQL syntax) query for SQLite.
+    Call sites pass string literals, so the rewrite is memoized per SQL text.
+    """
+    # 1. Replace %s with ?
+    sqlite_query = query.replace("%s", "?")
+    # 2. Handle NOW() -> datetime('now')
+    sqlite_query = sqlite_query.replace("NOW()", "datetime('now')")
+    # 3. Handle INSERT IGNORE -> INSERT OR IGNORE
+    sqlite_query = sqlite_query.replace("INSERT IGNORE", "INSERT OR IGNORE")
+    # 4. Handle ON DUPLICATE KEY UPDATE (Complex)
+    # SQLite uses ON CONFLICT DO UPDATE.
+    # Simplified approach: for simple upserts, it might fail or we rely on replace.
+    # For this app, the critical UPSERTs are in Link functions.
+    if "ON DUPLICATE KEY UPDATE" in sqlite_query:
+        # Crude Rewrite for specific known queries
+        if "asset_controls" in sqlite_query or "asset_nist_controls" in sqlite_query:
+            # Convert to INSERT OR REPLACE
+            sqlite_query = re.sub(r"INSERT INTO", "INSERT OR REPLACE INTO", sqlite_query, flags=re.IGNORECASE)
+            sqlite_query = sqlite_query.split("ON DUPLICATE")[0] # Strip the update part method
+    return sqlite_query
+
+# --- CACHED REFERENCE QUERIES ---
+# Read-mostly tables are cached across Streamlit reruns. The manager instance is
+# passed as an unhashed argument (leading underscore); `mode` keys the cache so
+# Cloud and Local results are never mixed. Writers call `.clear()` to invalidate.
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_nist_controls(_db, mode):
+    return _db.execute("SELECT * FROM nist_controls ORDER BY id", fetch=True) or []
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_policies(_db, mode):
+    return _db.execute("SELECT id, name, category, summary, created_at FROM policies ORDER BY created_at DESC", fetch=True) or []
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_policies_with_mappings(_db, mode):
+    # One round trip for the list tab; GROUP_CONCAT exists in MySQL and SQLite.
+    # GROUP BY the PK lets MySQL accept the other policy columns as-is.
+    rows = _db.execute(
+        "SELECT p.id, p.name, p.category, p.summary, p.created_at, "
+        "GROUP_CONCAT(m.nist_control_id) AS mappings "
+        "FROM policies p LEFT JOIN policy_nist_mappings m ON m.policy_id = p.id "
+        "GROUP BY p.id, p.name, p.category, p.summary, p.created_at "
+        "ORDER BY p.created_at DESC",
+        fetch=True
+    ) or []
+    for r in rows:
+        r['mappings'] = r['mappings'].split(',') if r['mappings'] else []
+    return rows
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_policy_mappings(_db, mode, policy_id):
+    # Served entirely by the (policy_id, nist_control_id) PK as a leftmost-prefix
+    # scan (EXPLAIN: "Using index"). Do not add a separate policy_id index.
+    return _db.execute("SELECT nist_control_id FROM policy_nist_mappings WHERE policy_id=%s", (policy_id,), fetch=True) or []
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_ticket_assets(_db, mode):
+    # Machines and software in one round trip; 'kind' tags the source table
+    return _db.execute(
+        "SELECT id, name, 'computing_machine' AS kind FROM kpu_enterprise_computing_machines "
+        "UNION ALL "
+        "SELECT id, name, 'software' AS kind FROM kpu_enterprise_software",
+        fetch=True
+    ) or []
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_tables(_db, source):
+    # Keyed by source ("PRIMARY"/"SECONDARY"); errors propagate and are not cached
+    config = st.secrets["mysql"] if source == "PRIMARY" else st.secrets["mysql_backup"]
+    conn = _db._connect_to_source(config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SHOW TABLES")
+        tables = [r[0] for r in cursor.fetchall()]
+        cursor.close()
+        return tables
+    finally:
+        conn.close()
+
 class DatabaseManager:
     """
     Manages hybrid database connections (Cloud MySQL + Local SQLite).
     """
     VERSION_ID = "2.1.V01" # Incremented to force session state reset
     
+    # MySQL connection pools, shared by every instance in the process
+    # Key: logical target (config host, port, user, database, password digest)
+    # -> (MySQLConnectionPool, local SSH tunnel port or None)
+    _pools = {}
+    _pools_lock = threading.Lock()
+    _pool_ids = itertools.count()
+    # Serializes SSH tunnel setup when sources are connected from worker threads
+    _tunnel_lock = threading.Lock()
+    
     def __init__(self, secrets_override=None):
         """
         Initializes the manager, tests cloud connection, and sets initial mode.
@@ -283,7 +382,9 @@ class DatabaseManager:
                 owner VARCHAR(100),
                 os_type VARCHAR(50),
                 location VARCHAR(100),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_ecm_mac_ip (mac_address, ip_address),
+                INDEX idx_ecm_ip (ip_address)
             )""")
 
             cur.execute("""CREATE TABLE IF NOT EXISTS software_licenses (
@@ -328,7 +429,8 @@ class DatabaseManager:
                 category VARCHAR(100),
                 summary TEXT,
                 content TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_policies_created (created_at DESC)
             )""")
             
             cur.execute("""CREATE TABLE IF NOT EXISTS sla_policies (
@@ -362,7 +464,8 @@ class DatabaseManager:
             cur.execute("""CREATE TABLE IF NOT EXISTS policy_nist_mappings (
                 policy_id INT,
                 nist_control_id VARCHAR(50),
-                PRIMARY KEY (policy_id, nist_control_id)
+                PRIMARY KEY (policy_id, nist_control_id),
+                INDEX idx_pnm_control (nist_control_id)
             )""")
 
             cur.execute("""CREATE TABLE IF NOT EXISTS companion_users (
@@ -412,8 +515,12 @@ class DatabaseManager:
                 INDEX idx_ticket_comments (ticket_id)
             )""")
 
+            # Indexes that IF NOT EXISTS never adds to an existing table
+            add_missing_indexes(cur)
+
             conn.commit()
             conn.close()
+            _cached_tables.clear() # New tables may now exist
             return True, "Schema Repair Complete."
             
         except Exception as e:
@@ -495,7 +602,8 @@ class DatabaseManager:
                 password=vps_cfg['password'],
                 database=vps_cfg['database'],
                 port=db_port,
-                connection_timeout=10
+                connection_timeout=10,
+                use_pure=False
             )
         except Exception as e:
             print(f"VPS Connection Error: {e}")
@@ -549,23 +657,8 @@ class DatabaseManager:
 
         # 2. LOCAL MODE
         if self.mode == "LOCAL":
-            # Convert MySQL query to SQLite
-            # 1. Replace %s with ?
-            sqlite_query = query.replace("%s", "?")
-            # 2. Handle NOW() -> datetime('now')
-            sqlite_query = sqlite_query.replace("NOW()", "datetime('now')")
-            # 3. Handle INSERT IGNORE -> INSERT OR IGNORE
-            sqlite_query = sqlite_query.replace("INSERT IGNORE", "INSERT OR IGNORE")
-            # 4. Handle ON DUPLICATE KEY UPDATE (Complex)
-            # SQLite uses ON CONFLICT DO UPDATE.
-            # Simplified approach: for simple upserts, it might fail or we rely on replace.
-            # For this app, the critical UPSERTs are in Link functions.
-            if "ON DUPLICATE KEY UPDATE" in sqlite_query:
-                # Crude Rewrite for specific known queries
-                if "asset_controls" in sqlite_query or "asset_nist_controls" in sqlite_query:
-                    # Convert to INSERT OR REPLACE
-                    sqlite_query = re.sub(r"INSERT INTO", "INSERT OR REPLACE INTO", sqlite_query, flags=re.IGNORECASE)
-                    sqlite_query = sqlite_query.split("ON DUPLICATE")[0] # Strip the update part method
+            # Convert MySQL query to SQLite (memoized per SQL literal)
+            sqlite_query = _mysql_to_sqlite(query)
 
             conn = self._get_local_conn()
             # Row factory for dictionary-like access
@@ -586,6 +679,72 @@ class DatabaseManager:
                 conn.close()
                 return [] if fetch else False
 
+    def execute_many(self, query, seq_params):
+        """
+        Runs one write statement for every parameter tuple in `seq_params`, on a
+        single connection with a single commit. In CLOUD mode mysql-connector
+        rewrites a plain INSERT ... VALUES template into one multi-row INSERT.
+        Only connection failures switch to Local mode; a data error rolls the
+        batch back and returns False. MySQL-only upserts are not replayed
+        locally: the switch happens and False is returned, so check db.mode.
+        
+        Args:
+            query (str): SQL query (MySQL syntax).
+            seq_params (list): Parameter tuples, one per row.
+            
+        Returns:
+            bool: True on success, False if the batch was rolled back.
+        """
+        if not seq_params:
+            return True
+        
+        # 1. CLOUD MODE
+        if self.mode == "CLOUD":
+            conn = self._get_cloud_conn()
+            lost = None
+            if conn is None:
+                lost = "Cloud unreachable"
+            else:
+                try:
+                    cursor = conn.cursor()
+                    cursor.executemany(query, seq_params)
+                    conn.commit()
+                    return True
+                except (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError) as e:
+                    lost = e # Connection-level failure: nothing was committed
+                except Exception as e:
+                    # Data error (constraint, bad value, ...): report it, stay online
+                    print(f"Cloud Error: {e}")
+                    conn.rollback()
+                    return False
+                finally:
+                    conn.close()
+            
+            print(f"Cloud Error: {lost}. Switching to Local.")
+            self.mode = "LOCAL"
+            self.status_msg = f"🟠 Offline Mode ({str(lost)}) [Fallback]"
+            if "ON DUPLICATE KEY UPDATE" in _mysql_to_sqlite(query):
+                # No SQLite rewrite for this upsert: let the caller retry with a
+                # Local template instead of replaying MySQL-only SQL
+                return False
+            return self.execute_many(query, seq_params)
+
+        # 2. LOCAL MODE
+        if self.mode == "LOCAL":
+            sqlite_query = _mysql_to_sqlite(query)
+
+            conn = self._get_local_conn()
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(sqlite_query, seq_params)
+                conn.commit()
+                conn.close()
+                return True
+            except Exception as e:
+                st.error(f"Local DB Error: {e}")
+                conn.close()
+                return False
+
     def _dict_factory(self, cursor, row):
         """Helper to convert SQLite tuples to dictionaries."""
         d = {}
@@ -764,6 +923,9 @@ class DatabaseManager:
             location TEXT,
             created_at TIMESTAMP
         )""")
+        # MAC/IP lookups used by the discovery importer
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_ecm_mac_ip ON kpu_enterprise_computing_machines (mac_address, ip_address)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_ecm_ip ON kpu_enterprise_computing_machines (ip_address)")
 
         cur.execute("""CREATE TABLE IF NOT EXISTS software_licenses (
             id INTEGER PRIMARY KEY,
@@ -1012,42 +1174,53 @@ class DatabaseManager:
         minutes = slas.get(priority, 1440)
         return datetime.now() + timedelta(minutes=minutes)
 
-    def create_ticket(self, asset_id, ticket_type, title, description, priority, logged_by, related_type=None, status='Open'):
+    def create_ticket(self, asset_id, ticket_type, title, description, priority, logged_by, related_type=None, status='Open', attachment=None):
         """
         Creates a new ticket with SLA due date.
+        If `attachment` (an UploadedFile) is given, its record is inserted on the
+        same connection and committed in the same transaction as the ticket.
         Returns: new_ticket_id (int) or None
         """
         try:
             due_date = self.calculate_sla_due_date(priority)
             
-            # Cloud vs Local SQL
+            # Cloud vs Local connection; SQL is canonical MySQL, rewritten for SQLite
             if self.mode == "CLOUD":
                 conn = self._get_cloud_conn()
                 if not conn:
                     return None
-                
-                cursor = conn.cursor()
-                sql = """
-                    INSERT INTO tickets (asset_id, ticket_type, title, description, priority, logged_by, related_type, due_date, status, created_at)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-                """
-                cursor.execute(sql, (asset_id, ticket_type, title, description, priority, logged_by, related_type, due_date, status))
-                conn.commit()
-                last_id = cursor.lastrowid
-                conn.close()
-                return last_id
+                dialect = lambda q: q
             else:
                 conn = self._get_local_conn()
-                cursor = conn.cursor()
+                dialect = _mysql_to_sqlite
+            
+            cursor = conn.cursor()
+            stored_name = None # Attachment file written to disk (removed again on rollback)
+            try:
                 sql = """
                     INSERT INTO tickets (asset_id, ticket_type, title, description, priority, logged_by, related_type, due_date, status, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
                 """
-                cursor.execute(sql, (asset_id, ticket_type, title, description, priority, logged_by, related_type, due_date, status))
-                conn.commit()
+                cursor.execute(dialect(sql), (asset_id, ticket_type, title, description, priority, logged_by, related_type, due_date, status))
                 last_id = cursor.lastrowid
-                conn.close()
+                
+                if attachment is not None:
+                    file_name, file_path = self._store_attachment_file(last_id, attachment)
+                    stored_name = file_name
+                    sql_att = "INSERT INTO ticket_attachments (ticket_id, file_name, file_path, uploaded_at) VALUES (%s, %s, %s, NOW())"
+                    cursor.execute(dialect(sql_att), (last_id, file_name, file_path))
+                
+                conn.commit() # Ticket (+ attachment) in one commit
                 return last_id
+            except Exception:
+                # SQLite may hand the rolled-back rowid to the next ticket, so the
+                # file must not outlive the transaction
+                if stored_name:
+                    self._remove_attachment_file(last_id, stored_name)
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
         except Exception as e:
             print(f"Error creating ticket: {e}")
             return None
@@ -1127,6 +1300,50 @@ class DatabaseManager:
             print(f"Error creating ticket: {e}")
             return None
 
+    def _store_attachment_file(self, ticket_id, uploaded_file):
+        """
+        Writes an uploaded file to the local attachment directory (and, best
+        effort, the network path). Returns (safe_filename, local_path).
+        """
+        cfg = self.get_storage_config()
+        local_dir = cfg["local_path"]
+        net_dir = cfg["network_path"]
+        
+        # 1. Ensure Local Directory Exists
+        if not os.path.exists(local_dir):
+            os.makedirs(local_dir)
+        
+        # Sanitize filename
+        safe_filename = re.sub(r'[^a-zA-Z0-9_.-]', '_', uploaded_file.name)
+        
+        # 2. Save File Locally
+        local_path = os.path.join(local_dir, f"{ticket_id}_{safe_filename}")
+        with open(local_path, "wb") as f:
+            f.write(uploaded_file.getbuffer())
+            
+        # 3. Save to Network (Best Effort)
+        if net_dir and net_dir != local_dir and os.path.exists(net_dir):
+            try:
+                net_path = os.path.join(net_dir, f"{ticket_id}_{safe_filename}")
+                shutil.copy2(local_path, net_path)
+            except Exception as e:
+                print(f"Network Save Failed: {e}")
+        
+        return safe_filename, local_path
+
+    def _remove_attachment_file(self, ticket_id, safe_filename):
+        """Deletes the local and network copies written by _store_attachment_file."""
+        cfg = self.get_storage_config()
+        for folder in {cfg["local_path"], cfg["network_path"]}:
+            if not folder:
+                continue
+            path = os.path.join(folder, f"{ticket_id}_{safe_filename}")
+            try:
+                if os.path.exists(path):
+                    os.remove(path)
+            except OSError as e:
+                print(f"Attachment Cleanup Failed ({path}): {e}")
+
     def save_attachment(self, ticket_id, uploaded_file):
         """
         Saves an uploaded file to the local directory and records it in the database.
@@ -1140,31 +1357,9 @@ class DatabaseManager:
             bool: True on success, False on failure.
         """
         try:
-            cfg = self.get_storage_config()
-            local_dir = cfg["local_path"]
-            net_dir = cfg["network_path"]
-            
-            # 1. Ensure Local Directory Exists
-            if not os.path.exists(local_dir):
-                os.makedirs(local_dir)
-            
-            # Sanitize filename
-            safe_filename = re.sub(r'[^a-zA-Z0-9_.-]', '_', uploaded_file.name)
-            
-            # 2. Save File Locally
-            local_path = os.path.join(local_dir, f"{ticket_id}_{safe_filename}")
-            with open(local_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-                
-            # 3. Save to Network (Best Effort)
-            if net_dir and net_dir != local_dir and os.path.exists(net_dir):
-                try:
-                    net_path = os.path.join(net_dir, f"{ticket_id}_{safe_filename}")
-                    shutil.copy2(local_path, net_path)
-                except Exception as e:
-                    print(f"Network Save Failed: {e}")
+            safe_filename, local_path = self._store_attachment_file(ticket_id, uploaded_file)
                 
-            # 4. Insert Record
+            # Insert Record
             if self.mode == "CLOUD":
                 sql = "INSERT INTO ticket_attachments (ticket_id, file_name, file_path, uploaded_at) VALUES (%s, %s, %s, NOW())"
                 self.execute(sql, (ticket_id, safe_filename, local_path))
@@ -1324,30 +1519,87 @@ class DatabaseManager:
         if use_ssh:
              # Ensure Tunnel is open
              # We reuse the existing tunnel if it matches, or restart
-             if not self.ssh_tunnel or self.ssh_tunnel.ssh_host != ssh_conf['host']:
-                 if self.ssh_tunnel: self.ssh_tunnel.stop()
-                 from utils.sshtunnel_helper import SSHTunnel
-                 self.ssh_tunnel = SSHTunnel(
-                    ssh_host=ssh_conf['host'],
-                    ssh_user=ssh_conf['user'],
-                    ssh_password=ssh_conf['password'],
-                    remote_bind_address=('127.0.0.1', 3306)
-                 )
-                 self.ssh_local_port = self.ssh_tunnel.start()
+             with DatabaseManager._tunnel_lock:
+                 if not self.ssh_tunnel or self.ssh_tunnel.ssh_host != ssh_conf['host']:
+                     self.stop_tunnel()
+                     from utils.sshtunnel_helper import SSHTunnel
+                     self.ssh_tunnel = SSHTunnel(
+                        ssh_host=ssh_conf['host'],
+                        ssh_user=ssh_conf['user'],
+                        ssh_password=ssh_conf['password'],
+                        remote_bind_address=('127.0.0.1', 3306)
+                     )
+                     self.ssh_local_port = self.ssh_tunnel.start()
             
              # Connect via Localhost
              conn_params = dict(config)
              conn_params['host'] = '127.0.0.1'
              conn_params['port'] = self.ssh_local_port
-             return mysql.connector.connect(**conn_params)
+             conn_params.setdefault('use_pure', False) # C extension protocol parser
+             return self._pooled_connect(config, conn_params, tunnel_port=self.ssh_local_port)
         else:
             # Direct Connect
-            return mysql.connector.connect(**config)
+            conn_params = dict(config)
+            conn_params.setdefault('use_pure', False) # C extension protocol parser
+            return self._pooled_connect(config, conn_params)
+
+    def _pooled_connect(self, config, conn_params, tunnel_port=None):
+        """
+        Returns a connection from the shared pool for the logical target in
+        `config` (created on first use). close() hands it back to the pool
+        instead of disconnecting, so repeated db.execute() calls skip the
+        TCP/auth handshake. Sessions tunnelling to the same server share one
+        pool; `tunnel_port` records which SSH tunnel it was built on.
+        """
+        password = str(config.get('password', '')).encode()
+        key = (config.get('host'), config.get('port', 3306), config.get('user'),
+               config.get('database'), hashlib.sha256(password).hexdigest())
+        with DatabaseManager._pools_lock:
+            entry = DatabaseManager._pools.get(key)
+            if entry is None:
+                pool = pooling.MySQLConnectionPool(
+                    pool_name=f"kpu_{next(DatabaseManager._pool_ids)}",
+                    pool_size=5,
+                    **conn_params
+                )
+                entry = DatabaseManager._pools[key] = (pool, tunnel_port)
+        pool, pool_tunnel_port = entry
+        try:
+            # The pool re-checks (and reconnects) stale connections on checkout
+            return pool.get_connection()
+        except mysql.connector.errors.PoolError:
+            # All pooled connections are checked out: fall back to a one-off connection
+            return mysql.connector.connect(**conn_params)
+        except mysql.connector.Error:
+            if pool_tunnel_port is None or pool_tunnel_port == tunnel_port:
+                raise
+            # Built on another session's tunnel that has since died: rebuild on ours
+            DatabaseManager._evict_tunnel_pools(pool_tunnel_port)
+            return self._pooled_connect(config, conn_params, tunnel_port)
+
+    @staticmethod
+    def _evict_tunnel_pools(tunnel_port):
+        """Drops every pool that was built on the SSH tunnel at `tunnel_port`."""
+        with DatabaseManager._pools_lock:
+            for key, (_, port) in list(DatabaseManager._pools.items()):
+                if port == tunnel_port:
+                    del DatabaseManager._pools[key]
+
+    def stop_tunnel(self):
+        """Stops this manager's SSH tunnel (if any) and evicts the pools built on it."""
+        if not self.ssh_tunnel:
+            return
+        self.ssh_tunnel.stop()
+        if self.ssh_local_port is not None:
+            DatabaseManager._evict_tunnel_pools(self.ssh_local_port)
+        self.ssh_tunnel = None
+        self.ssh_local_port = None
 
     # --- CLOUD REPLICATION ---
     def get_tables(self, source="PRIMARY"):
         """
         Fetches the list of tables from the specified cloud database.
+        Cached for 30s; see clear_tables_cache().
         
         Args:
             source (str): "PRIMARY" or "SECONDARY"
@@ -1358,30 +1610,22 @@ class DatabaseManager:
         if "mysql" not in st.secrets or "mysql_backup" not in st.secrets:
             raise ValueError("Missing database secrets.")
 
-        config = st.secrets["mysql"] if source == "PRIMARY" else st.secrets["mysql_backup"]
-        
-        conn = None
-        try:
-            conn = self._connect_to_source(config)
-            cursor = conn.cursor()
-            cursor.execute("SHOW TABLES")
-            rows = cursor.fetchall()
-            tables = [r[0] for r in rows]
-            cursor.close()
-            conn.close()
-            return tables
-        except Exception as e:
-            if conn: conn.close()
-            # Re-raise to let caller handle/display
-            raise e
+        # Errors re-raise to let caller handle/display
+        return _cached_tables(self, source)
+
+    def clear_tables_cache(self):
+        """Drops the cached table lists (after schema repair or replication)."""
+        _cached_tables.clear()
 
-    def replicate_cloud_db(self, direction="PRIMARY_TO_SECONDARY", tables=None):
+    def replicate_cloud_db(self, direction="PRIMARY_TO_SECONDARY", tables=None, batch_size=1000, on_progress=None):
         """
         Replicates data between Primary and Secondary Cloud Databases.
         
         Args:
             direction (str): "PRIMARY_TO_SECONDARY" or "SECONDARY_TO_PRIMARY"
             tables (list, optional): Specific tables to sync. If None, syncs ALL tables found in Source.
+            batch_size (int): Rows per multi-row INSERT (keeps each statement under max_allowed_packet).
+            on_progress (callable, optional): Called as on_progress(done, total) after each table.
             
         Returns:
             tuple: (success (bool), message (str))
@@ -1444,7 +1688,8 @@ class DatabaseManager:
             
             tgt_conn = self._connect_to_source(tgt_cfg)
             
-            src_cur = src_conn.cursor(dictionary=True)
+            # Plain tuple rows: they go straight into executemany
+            src_cur = src_conn.cursor()
             tgt_cur = tgt_conn.cursor()
             
             # Disable FK checks on target for bulk load
@@ -1452,11 +1697,11 @@ class DatabaseManager:
             
             success_count = 0
             
-            for tbl in tables:
+            for done, tbl in enumerate(tables, 1):
                 try:
-                    # 1. Fetch Source
+                    # 1. Fetch Source (streamed below in batch_size pieces)
                     src_cur.execute(f"SELECT * FROM `{tbl}`") # Backticks for safety
-                    rows = src_cur.fetchall()
+                    rows = src_cur.fetchmany(batch_size)
                     
                     if not rows: 
                         # Even if empty, we might want to ensure table exists on target?
@@ -1473,17 +1718,21 @@ class DatabaseManager:
                         continue
                     
                     # 2. Prep Insert
-                    cols = list(rows[0].keys())
+                    cols = src_cur.column_names
                     col_names = ", ".join([f"`{c}`" for c in cols])
                     placeholders = ", ".join(["%s"] * len(cols))
                     
                     # Using INSERT IGNORE to handle updates presence without overwriting
                     sql = f"INSERT IGNORE INTO `{tbl}` ({col_names}) VALUES ({placeholders})"
                     
-                    # 3. Bulk Execute
-                    data = [tuple(r.values()) for r in rows]
-                    tgt_cur.executemany(sql, data)
-                    print(f"Replicated {len(data)} rows for {tbl}")
+                    # 3. Bulk Execute: executemany folds each batch into one
+                    # multi-row INSERT, so a table costs ~rows/batch_size round trips
+                    copied = 0
+                    while rows:
+                        tgt_cur.executemany(sql, rows)
+                        copied += len(rows)
+                        rows = src_cur.fetchmany(batch_size)
+                    print(f"Replicated {copied} rows for {tbl}")
                     success_count += 1
                     
                 except Exception as e:
@@ -1491,6 +1740,12 @@ class DatabaseManager:
                     # If table doesn't exist on target, this will fail.
                     # We could try to create it, but getting schema structure across connection is complex in python.
                     # We will log it.
+                    try:
+                        src_cur.fetchall() # Drain any unread source rows before the next table
+                    except Exception:
+                        pass
+                finally:
+                    if on_progress: on_progress(done, len(tables))
             
             tgt_cur.execute("SET FOREIGN_KEY_CHECKS=1;")
             tgt_conn.commit()
@@ -1535,8 +1790,7 @@ class DatabaseManager:
                 with st.spinner("Syncing Cloud Data..."):
                     success, msg = self.sync()
                     if success:
-                        st.success(f"✅ {msg}")
-                        time.sleep(1)
+                        st.toast(msg, icon="✅")
                         st.rerun()
                     else:
                         st.error(f"❌ {msg}")
@@ -1553,85 +1807,159 @@ class DatabaseManager:
             st.divider()
             
             # --- App Suite Integration ---
-            st.markdown("### 📱 App Suite")
-            
-            # Helper: Check Directory
-            def check_dir(app_name):
-                current_dir = os.getcwd()
-                parent_dir = os.path.dirname(current_dir)
-                return os.path.exists(os.path.join(parent_dir, app_name))
-
-            # Helper: Check Port
-            def is_port_open(port):
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.settimeout(0.5) # Fast timeout
-                    return s.connect_ex(('localhost', port)) == 0
-
-            # --- 2D SOC (Port 8502) ---
-            if check_dir("2D_SOC"):
-                if is_port_open(8502):
-                    st.markdown("🟢 [**2D SOC**](http://localhost:8502)")
-                else:
-                    st.warning("🔴 **2D SOC** (Offline)")
-                    st.caption("Run `streamlit run app.py` in `../2D_SOC`")
-            else:
-                st.error("❌ 2D SOC Not Found")
-                st.caption("Clone `2D_SOC` to parent directory.")
-
-            # --- 2D Pentester (Port 8503) ---
-            if check_dir("2D_Pentester"):
-                if is_port_open(8503):
-                    st.markdown("🟢 [**2D Pentester**](http://localhost:8503)")
-                else:
-                    st.warning("🔴 **2D Pentester** (Offline)")
-                    st.caption("Run `streamlit run app.py` in `../2D_Pentester`")
-            else:
-                st.error("❌ 2D Pentester Not Found")
-                st.caption("Clone `2D_Pentester` to parent directory.")
+            # Rendered as a fragment: reruns on its own timer, not with the page
+            _render_app_suite()
 
     # --- POLICY MANAGEMENT ---
     def create_policy(self, name, category, summary, content):
-        """Creates a new Governance Policy."""
-        sql_cloud = "INSERT INTO policies (name, category, summary, content, created_at) VALUES (%s, %s, %s, %s, NOW())"
-        sql_local = "INSERT INTO policies (name, category, summary, content, created_at) VALUES (?, ?, ?, ?, datetime('now'))"
+        """
+        Creates a new Governance Policy.
+        Returns: (True, new_policy_id) or (False, error_message)
+        """
+        # Canonical MySQL syntax, rewritten for SQLite in LOCAL mode. Runs on its
+        # own connection so the id comes from cursor.lastrowid, not a name lookup.
+        sql = "INSERT INTO policies (name, category, summary, content, created_at) VALUES (%s, %s, %s, %s, NOW())"
         
         try:
             if self.mode == "CLOUD":
-                self.execute(sql_cloud, (name, category, summary, content))
+                conn = self._get_cloud_conn()
+                if not conn:
+                    return False, "Cloud connection unavailable"
+                dialect = lambda q: q
             else:
-                self.execute(sql_local, (name, category, summary, content))
-            return True, "Policy Created Successfully"
+                conn = self._get_local_conn()
+                dialect = _mysql_to_sqlite
+            
+            try:
+                cursor = conn.cursor()
+                cursor.execute(dialect(sql), (name, category, summary, content))
+                new_id = cursor.lastrowid
+                conn.commit()
+            finally:
+                conn.close()
+            
+            _cached_policies.clear()
+            _cached_policies_with_mappings.clear()
+            return True, new_id
         except Exception as e:
             return False, str(e)
 
     def get_policies(self):
-        """Fetches all policies."""
-        return self.execute("SELECT * FROM policies ORDER BY created_at DESC", fetch=True) or []
+        """Fetches the policy list (without the heavy 'content' body). Cached for 60s."""
+        return _cached_policies(self, self.mode)
+
+    def get_policies_with_mappings(self):
+        """Policy list with each policy's NIST control ids in 'mappings'. Cached for 60s."""
+        return _cached_policies_with_mappings(self, self.mode)
+
+    def get_policy_content(self, policy_id):
+        """Fetches the full Markdown body of a single policy for the detail view."""
+        res = self.execute("SELECT content FROM policies WHERE id=%s", (policy_id,), fetch=True)
+        return res[0]['content'] if res else ""
 
     def get_nist_controls(self):
-        """Fetches all NIST controls for mapping."""
-        # Ensure table exists first if not handled
-        return self.execute("SELECT * FROM nist_controls ORDER BY id", fetch=True) or []
+        """Fetches all NIST controls for mapping. Cached for 1h (seeded reference data)."""
+        return _cached_nist_controls(self, self.mode)
     
     def link_policy_to_nist(self, policy_id, nist_control_id):
-        """Maps a policy to a NIST control."""
-        # Check existence
-        existing = self.execute(f"SELECT * FROM policy_nist_mappings WHERE policy_id={policy_id} AND nist_control_id='{nist_control_id}'", fetch=True)
-        if existing: return True # Already linked
-        
-        sql_cloud = "INSERT INTO policy_nist_mappings (policy_id, nist_control_id) VALUES (%s, %s)"
-        sql_local = "INSERT INTO policy_nist_mappings (policy_id, nist_control_id) VALUES (?, ?)"
+        """Maps a policy to a NIST control (idempotent)."""
+        # The (policy_id, nist_control_id) PK rejects duplicates server-side,
+        # so no existence check is needed. Rewritten to INSERT OR IGNORE locally.
+        sql = "INSERT IGNORE INTO policy_nist_mappings (policy_id, nist_control_id) VALUES (%s, %s)"
         
         try:
-            if self.mode == "CLOUD":
-                self.execute(sql_cloud, (policy_id, nist_control_id))
-            else:
-                self.execute(sql_local, (policy_id, nist_control_id))
+            self.execute(sql, (policy_id, nist_control_id))
+            _cached_policy_mappings.clear()
+            _cached_policies_with_mappings.clear()
             return True
         except Exception as e:
             print(f"Link Error: {e}")
             return False
 
+    def link_policies_to_nist_bulk(self, policy_id, nist_control_ids):
+        """Maps a policy to many NIST controls in one round trip (idempotent)."""
+        # executemany folds the template into one multi-row INSERT IGNORE on MySQL
+        sql = "INSERT IGNORE INTO policy_nist_mappings (policy_id, nist_control_id) VALUES (%s, %s)"
+        
+        try:
+            ok = self.execute_many(sql, [(policy_id, nid) for nid in nist_control_ids])
+            _cached_policy_mappings.clear()
+            _cached_policies_with_mappings.clear()
+            return ok
+        except Exception as e:
+            print(f"Link Error: {e}")
+            return False
+
     def get_policy_mappings(self, policy_id):
-        """Get linked NIST controls for a policy."""
-        return self.execute(f"SELECT nist_control_id FROM policy_nist_mappings WHERE policy_id={policy_id}", fetch=True) or []
+        """Get linked NIST controls for a policy. Cached for 60s."""
+        return _cached_policy_mappings(self, self.mode, policy_id)
+
+    # --- TICKET ASSET CATALOG ---
+    def get_ticket_assets(self):
+        """Machines and software selectable on a ticket (id, name, kind). Cached for 5 min."""
+        return _cached_ticket_assets(self, self.mode)
+
+    def clear_ticket_assets_cache(self):
+        """Drops the cached asset catalog, e.g. after an import."""
+        _cached_ticket_assets.clear()
+
+
+# =============================================================================
+# Sidebar: App Suite Status
+# =============================================================================
+# Sibling apps are expected next to this repo; paths are resolved once at import.
+_PARENT_DIR = os.path.dirname(os.getcwd())
+_APP_PATHS = {
+    "2D_SOC": os.path.join(_PARENT_DIR, "2D_SOC"),
+    "2D_Pentester": os.path.join(_PARENT_DIR, "2D_Pentester"),
+}
+
+@st.cache_resource
+def _probe_executor():
+    """Shared worker pool for App Suite port probes (reused across reruns)."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="app-suite-probe")
+
+@st.fragment(run_every=5)
+def _render_app_suite():
+    """
+    Renders sibling-app availability (2D SOC, 2D Pentester) in the sidebar.
+    Runs as a fragment so its directory/port probes refresh every 5s
+    without being repeated on every full-page rerun.
+    """
+    st.markdown("### 📱 App Suite")
+
+    # Helper: Check Directory
+    def check_dir(app_name):
+        return os.path.exists(_APP_PATHS[app_name])
+
+    # Helper: Check Port
+    def is_port_open(port):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(0.5) # Fast timeout
+            # Literal IP skips the getaddrinfo/NSS lookup that 'localhost' triggers
+            return s.connect_ex(('127.0.0.1', port)) == 0
+
+    # Probe all ports concurrently; results are collected as each section renders
+    probes = {port: _probe_executor().submit(is_port_open, port) for port in (8502, 8503)}
+
+    # --- 2D SOC (Port 8502) ---
+    if check_dir("2D_SOC"):
+        if probes[8502].result():
+            st.markdown("🟢 [**2D SOC**](http://localhost:8502)")
+        else:
+            st.warning("🔴 **2D SOC** (Offline)")
+            st.caption("Run `streamlit run app.py` in `../2D_SOC`")
+    else:
+        st.error("❌ 2D SOC Not Found")
+        st.caption("Clone `2D_SOC` to parent directory.")
+
+    # --- 2D Pentester (Port 8503) ---
+    if check_dir("2D_Pentester"):
+        if probes[8503].result():
+            st.markdown("🟢 [**2D Pentester**](http://localhost:8503)")
+        else:
+            st.warning("🔴 **2D Pentester** (Offline)")
+            st.caption("Run `streamlit run app.py` in `../2D_Pentester`")
+    else:
+        st.error("❌ 2D Pentester Not Found")
+        st.caption("Clone `2D_Pentester` to parent directory.")
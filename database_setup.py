@@ -1,49 +1,739 @@
-import mysql.connector
-import streamlit as st
+import functools
+import hashlib
+import itertools
+import os
+import re
+import sys
+import tempfile
+import threading
+from collections import deque
 
 # Configuration
-# Checks if secrets are available, otherwise gracefully warns or fails
+# Secrets and the MySQL driver are resolved lazily on first connection, so
+# importing this module (e.g. from a local-only deployment) stays cheap.
 # This is crucial for Cloud Sync to work securely
-if "mysql" in st.secrets:
-    SECRETS = st.secrets["mysql"]
-else:
-    print("Error: 'mysql' section not found in st.secrets. Please configure your .streamlit/secrets.toml")
-    exit(1)
+
+def get_secrets():
+    """
+    Returns the [mysql] section of st.secrets.
+    Raises RuntimeError (instead of exiting the process) if it is not configured.
+    """
+    import streamlit as st
+    if "mysql" not in st.secrets:
+        raise RuntimeError("'mysql' section not found in st.secrets. Please configure your .streamlit/secrets.toml")
+    return st.secrets["mysql"]
+
+@functools.lru_cache(maxsize=1)
+def get_connect_kwargs():
+    """Builds the mysql.connector kwargs from secrets once and reuses them."""
+    secrets = get_secrets()
+    return {
+        "host": secrets["host"],
+        "user": secrets["user"],
+        "password": secrets["password"],
+        "database": secrets["database"],
+        "port": secrets.get("port", 3306),
+        "use_pure": False, # C extension protocol parser
+        "allow_local_infile": True, # Required for LOAD DATA LOCAL (seed/*.csv)
+    }
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Returns the shared MySQL connection pool, creating it on first use.
+    Creation is lazy so importing this module never needs secrets.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from mysql.connector import pooling
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name="kpu",
+                    pool_size=10,
+                    **get_connect_kwargs()
+                )
+    return _pool
 
 def get_connection():
     """
-    Establishes a connection to the configured MySQL database.
+    Borrows a connection from the shared pool. Calling .close() on it returns
+    it to the pool instead of tearing down the TCP/auth session.
     Retries or error handling should be managed by the caller.
     """
-    return mysql.connector.connect(
-        host=SECRETS["host"],
-        user=SECRETS["user"],
-        password=SECRETS["password"],
-        database=SECRETS["database"],
-        port=SECRETS.get("port", 3306)
-    )
+    return get_pool().get_connection()
+
+def get_cursor(conn):
+    """
+    Canonical cursor for this module: plain tuples (fetchone()[0], no per-row
+    dict building) and buffered, so back-to-back execute() calls never hit
+    "Unread result found". Ask for dictionary=True explicitly where needed.
+    """
+    return conn.cursor(buffered=True)
+
+# -----------------------------------------------------
+# SEED DATA (versioned CSVs under seed/)
+# -----------------------------------------------------
+# Reference data lives in seed/*.csv and is bulk-loaded with LOAD DATA LOCAL INFILE,
+# bypassing per-row INSERT parsing. That needs local_infile=ON on the server (MySQL 8
+# defaults to OFF); otherwise the CSVs are inserted through executemany_batched().
+# seed/assets.csv carries pre-assigned IDs (parents before children) so the
+# hierarchy is stable across re-provisions.
+SEED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seed")
+
+# Parents for the CSV-imported assets (see seed/assets.csv)
+SEED_ENT_SW_ID = 66 # Enterprise Software
+SEED_ENT_HW_ID = 70 # Enterprise Hardware
+
+def load_seed_csv(cursor, filename, table, columns):
+    """
+    Bulk-loads seed/<filename> into `table`. The CSV has a header row, quoted
+    fields and \\N for NULL (MySQL LOAD DATA conventions). If the server has
+    local_infile disabled, the rows are parsed here and batch-inserted instead.
+    """
+    import csv
+    import mysql.connector
+
+    path = os.path.join(SEED_DIR, filename).replace("\\", "/")
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+            "FIELDS TERMINATED BY ',' ENCLOSED BY '\"' "
+            "LINES TERMINATED BY '\\n' IGNORE 1 LINES "
+            f"({', '.join(columns)})",
+            (path,)
+        )
+    except mysql.connector.Error as e:
+        print(f"LOAD DATA unavailable ({e}); falling back to executemany.")
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            next(reader, None) # Header row
+            executemany_batched(
+                cursor,
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                ([None if v == "\\N" else v for v in row] for row in reader)
+            )
+
+# Rows per executemany call (one multi-row INSERT each)
+BATCH_SIZE = 1000
+
+def executemany_batched(cursor, sql, rows, batch_size=BATCH_SIZE):
+    """
+    Runs executemany in chunks of batch_size rows.
+    mysql.connector rewrites a plain single-row "INSERT ... VALUES (%s, ...)"
+    template (no trailing ';', text-protocol cursor) into one multi-row INSERT
+    per call; chunking keeps each statement well under max_allowed_packet.
+    """
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, batch_size)):
+        cursor.executemany(sql, batch)
+
+def require_columns(reader, required, source):
+    """
+    Validates a csv.DictReader's header once, before any rows are read,
+    so a reshuffled export fails fast instead of importing the wrong column.
+    """
+    missing = set(required) - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"{source} is missing column(s): {', '.join(sorted(missing))}")
+
+def load_asset_nodes(cursor, nodes):
+    """
+    Bulk-inserts an iterable of (name, parent_id, type, description) rows into
+    assets and returns the row count. Rows are streamed into a temp CSV and sent
+    with LOAD DATA LOCAL INFILE; if the server has local_infile disabled, the
+    same file is replayed through executemany_batched().
+    """
+    import csv
+    import mysql.connector
 
-def setup_database():
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        count = 0
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\n")
+            for node in nodes:
+                writer.writerow(node)
+                count += 1
+        if not count:
+            return 0
+        try:
+            # ESCAPED BY '' keeps backslashes (e.g. DOMAIN\user) literal; quotes are doubled by csv
+            cursor.execute(
+                "LOAD DATA LOCAL INFILE %s INTO TABLE assets CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY ',' ENCLOSED BY '\"' ESCAPED BY '' "
+                "LINES TERMINATED BY '\\n' "
+                "(name, parent_id, type, description)",
+                (path.replace("\\", "/"),)
+            )
+        except mysql.connector.Error as e:
+            print(f"LOAD DATA unavailable ({e}); falling back to executemany.")
+            with open(path, encoding="utf-8", newline="") as f:
+                executemany_batched(
+                    cursor,
+                    "INSERT INTO assets (name, parent_id, type, description) VALUES (%s, %s, %s, %s)",
+                    csv.reader(f)
+                )
+        return count
+    finally:
+        os.remove(path)
+
+_DDL_TABLE_RE = re.compile(r"CREATE TABLE (?:IF NOT EXISTS )?(\w+)", re.IGNORECASE)
+_DDL_FK_RE = re.compile(r"REFERENCES (\w+)", re.IGNORECASE)
+
+def order_ddl(statements):
+    """
+    Orders CREATE TABLE statements so every FK parent is created before its
+    children (Kahn's algorithm over the REFERENCES edges).
+    Self-references (e.g. assets.parent_id) are ignored; references to tables
+    outside the list are assumed to already exist.
+    Returns a list of (table_name, statement) tuples.
+    """
+    by_name = {}
+    for stmt in statements:
+        by_name[_DDL_TABLE_RE.search(stmt).group(1)] = stmt
+
+    in_degree = {name: 0 for name in by_name}
+    children = {name: [] for name in by_name}
+    for name, stmt in by_name.items():
+        for parent in set(_DDL_FK_RE.findall(stmt)):
+            if parent != name and parent in by_name:
+                in_degree[name] += 1
+                children[parent].append(name)
+
+    # Seeded in declaration order so independent tables keep their listed order
+    queue = deque(name for name in by_name if in_degree[name] == 0)
+    ordered = []
+    while queue:
+        name = queue.popleft()
+        ordered.append((name, by_name[name]))
+        for child in children[name]:
+            in_degree[child] -= 1
+            if in_degree[child] == 0:
+                queue.append(child)
+
+    if len(ordered) != len(by_name):
+        cyclic = [name for name, deg in in_degree.items() if deg > 0]
+        raise RuntimeError(f"Foreign key cycle between tables: {', '.join(cyclic)}")
+    return ordered
+
+_NON_COLUMN_PREFIXES = ("PRIMARY", "INDEX", "KEY", "UNIQUE", "CONSTRAINT", "FOREIGN")
+
+def declared_columns(stmt):
+    """
+    Returns {column_name: column_definition} for a CREATE TABLE statement
+    written one column per line (as core_ddl is). Keys/constraints are skipped.
+    """
+    body = stmt[stmt.index("(") + 1:stmt.rindex(")")]
+    columns = {}
+    for line in body.splitlines():
+        line = line.split("--", 1)[0].strip().rstrip(",").strip()
+        if not line or line.upper().startswith(_NON_COLUMN_PREFIXES):
+            continue
+        columns[line.split()[0]] = line
+    return columns
+
+_INDEX_PREFIXES = ("INDEX", "KEY", "UNIQUE INDEX", "UNIQUE KEY")
+
+def declared_indexes(stmt):
+    """
+    Returns {index_name: index_definition} for the named INDEX/KEY lines of a
+    CREATE TABLE statement (same one-definition-per-line layout as columns).
+    """
+    body = stmt[stmt.index("(") + 1:stmt.rindex(")")]
+    indexes = {}
+    for line in body.splitlines():
+        line = line.split("--", 1)[0].strip().rstrip(",").strip()
+        if not line.upper().startswith(_INDEX_PREFIXES):
+            continue
+        tokens = line.split()
+        name = tokens[2] if tokens[0].upper() == "UNIQUE" else tokens[1]
+        indexes[name.split("(")[0]] = line
+    return indexes
+
+# Named secondary indexes added after their tables first shipped. CREATE TABLE
+# IF NOT EXISTS never re-runs on an existing database, so the backup initializer
+# and DatabaseManager.ensure_cloud_schema() add these via add_missing_indexes().
+# Keep in sync with the CREATE TABLE statements (sync_schema covers this module).
+LATE_INDEXES = {
+    "kpu_enterprise_computing_machines": {
+        "idx_ecm_mac_ip": "INDEX idx_ecm_mac_ip (mac_address, ip_address)",
+        "idx_ecm_ip": "INDEX idx_ecm_ip (ip_address)",
+    },
+}
+
+def add_missing_indexes(cursor, declared=LATE_INDEXES):
+    """
+    Adds the indexes in `declared` ({table: {index_name: definition}}) that an
+    existing table lacks, one ALTER TABLE per table. Tables that do not exist
+    are skipped. Returns the number of indexes added.
+    """
+    cursor.execute(
+        "SELECT DISTINCT TABLE_NAME, INDEX_NAME FROM information_schema.statistics "
+        "WHERE TABLE_SCHEMA = DATABASE()"
+    )
+    live = {}
+    for table, name in cursor.fetchall():
+        live.setdefault(table, set()).add(name)
+
+    added = 0
+    for table, indexes in declared.items():
+        if table not in live:
+            continue
+        missing = [f"ADD {defn}" for idx, defn in indexes.items() if idx not in live[table]]
+        if missing:
+            print(f"Adding {len(missing)} index(es) to {table}...")
+            cursor.execute(f"ALTER TABLE {table} " + ", ".join(missing))
+            added += len(missing)
+    return added
+
+def sync_schema(cursor, create_order):
+    """
+    Brings the live schema up to the declared one without dropping data:
+    missing tables are created (one multi-statement round trip) and missing
+    columns and named indexes are added with ALTER TABLE. Existing column
+    types are left as-is. Returns the set of table names that were created.
+    """
+    # Columns and index names in one round trip
+    cursor.execute(
+        "SELECT TABLE_NAME, COLUMN_NAME, 'column' FROM information_schema.columns "
+        "WHERE TABLE_SCHEMA = DATABASE() "
+        "UNION ALL "
+        "SELECT DISTINCT TABLE_NAME, INDEX_NAME, 'index' FROM information_schema.statistics "
+        "WHERE TABLE_SCHEMA = DATABASE()"
+    )
+    live = {}
+    live_indexes = {}
+    for table, name, kind in cursor.fetchall():
+        (live if kind == "column" else live_indexes).setdefault(table, set()).add(name)
+
+    created = {name for name, _ in create_order if name not in live}
+    if created:
+        ddl_sql = " ".join(stmt.strip().rstrip(";") + ";" for name, stmt in create_order if name in created)
+        for _ in cursor.execute(ddl_sql, multi=True):
+            pass
+
+    for name, stmt in create_order:
+        if name in created:
+            continue
+        missing = [f"ADD COLUMN {defn}" for col, defn in declared_columns(stmt).items() if col not in live[name]]
+        indexes = live_indexes.get(name, set())
+        missing += [f"ADD {defn}" for idx, defn in declared_indexes(stmt).items() if idx not in indexes]
+        if missing:
+            print(f"Adding {len(missing)} column(s)/index(es) to {name}...")
+            cursor.execute(f"ALTER TABLE {name} " + ", ".join(missing))
+    return created
+
+def values_clause(rows, parent_var=None):
+    """
+    Builds the VALUES list for a multi-row INSERT and its flat parameter list.
+    parent_var (e.g. "@l1_ops") is prepended to every row as a literal SQL
+    user variable, so the parent ID never round-trips through Python.
+    """
+    prefix = f"{parent_var}, " if parent_var else ""
+    values = ", ".join(f"({prefix}{', '.join(['%s'] * len(row))})" for row in rows)
+    return values, [value for row in rows for value in row]
+
+# V2.0 service hierarchy seed (see _create_and_seed, step 4). One entry per level:
+# (INSERT prefix, rows, parent variable, variable capturing the level's first new ID).
+# Module-level so schema_version() hashes it.
+V2_SEED_LEVELS = [
+    # 1. Business Services Level 1 (first row -> @l1_ops)
+    ("INSERT INTO kpu_business_services_level1 (name, description, owner) VALUES ", [
+        ("Corporate Operations", "Core business functions", "COO"),
+        ("Finance Org", "Financial management", "CFO")
+    ], None, "@l1_ops"),
+    # 2. Business Services Level 2, under @l1_ops (first row -> @l2_comm)
+    ("INSERT INTO kpu_business_services_level2 (business_service_level1_id, name, description) VALUES ", [
+        ("Corporate Communications", "Internal messaging and email services"),
+        ("Facilities Management", "Physical office management")
+    ], "@l1_ops", "@l2_comm"),
+    # 3. Technical Services (Now linked to Level 2), under @l2_comm (first row -> @ts_email)
+    ("INSERT INTO kpu_technical_services (business_service_level2_id, name, description, sla_level) VALUES ", [
+        ("Exchange Email Service", "Core email routing and storage", "Gold"),
+        ("Teams Collaboration", "Chat and Video conferencing", "Silver")
+    ], "@l2_comm", "@ts_email"),
+    # 4. Enterprise Assets, under @ts_email (first row -> @ea_svr)
+    ("INSERT INTO kpu_enterprise_assets (technical_service_id, name, asset_type, location) VALUES ", [
+        ("EXCH-SVR-01", "Server", "NY Data Center"),
+        ("EXCH-SVR-02", "Server", "London Data Center"),
+        ("Email Gateway Appliance", "Appliance", "Cloud")
+    ], "@ts_email", "@ea_svr"),
+    # 5. Component Assets, under @ea_svr
+    ("INSERT INTO kpu_component_assets (enterprise_asset_id, name, component_type, version) VALUES ", [
+        ("Transport Agent", "Software Module", "v15.2"),
+        ("C: Drive Volume", "Storage", "500GB SSD"),
+        ("Network Interface Card", "Hardware", "10GbE")
+    ], "@ea_svr", None),
+]
+
+def schema_version(ddl_statements):
+    """
+    Hash of everything setup_database() would build: the DDL, the late indexes,
+    the seed CSVs, the seed parent IDs and the V2 hierarchy seed. Stored in
+    schema_meta to detect an up-to-date database.
+    """
+    digest = hashlib.md5()
+    for stmt in ddl_statements:
+        digest.update(stmt.encode("utf-8"))
+    for filename in sorted(os.listdir(SEED_DIR)):
+        with open(os.path.join(SEED_DIR, filename), "rb") as f:
+            digest.update(f.read())
+    digest.update(f"{SEED_ENT_SW_ID}:{SEED_ENT_HW_ID}".encode("utf-8"))
+    digest.update(repr(sorted((t, sorted(idx.items())) for t, idx in LATE_INDEXES.items())).encode("utf-8"))
+    digest.update(repr(V2_SEED_LEVELS).encode("utf-8"))
+    return digest.hexdigest()
+
+def setup_database(reset=False):
     """
     Main setup routine:
-    1. Drops existing tables to ensure a clean slate (CAUTION: DATA LOSS).
-    2. Strings together the CREATE TABLE SQL statements for Assets, Changes, Policies, and ISO/NIST controls.
-    3. Seeds the database with default KPU Telecommunications hierarchy and compliance frameworks.
+    1. With reset=True only: drops existing tables for a clean slate (CAUTION: DATA LOSS).
+    2. Creates missing tables and adds missing columns to existing ones (see sync_schema).
+    3. Seeds newly created tables with the default KPU Telecommunications hierarchy and compliance frameworks.
+    Skipped when schema_meta already holds the current schema_version(), unless reset=True.
+    Returns True if the schema was synced.
     """
     try:
         conn = get_connection()
-        cursor = conn.cursor()
+        cursor = get_cursor(conn)
+        # Seed DML is grouped into explicit transactions committed once at the end
+        # (DDL below still commits implicitly, as MySQL always does)
+        conn.autocommit = False
     except Exception as e:
         print(f"Connection Failed: {e}")
-        return
+        return False
 
     print("--- Starting Database Setup ---")
+    # Bulk-load session: defer unique/FK checking until the data is in
+    cursor.execute("SET unique_checks=0")
+    cursor.execute("SET foreign_key_checks=0")
+    try:
+        built = _create_and_seed(cursor, reset)
+        conn.commit()
+        if built:
+            print("Database Setup Complete.")
+        return built
+    except Exception as e:
+        # Undo any uncommitted seed rows so the DB is not left half-seeded
+        conn.rollback()
+        print(f"Database Setup Failed: {e}")
+        raise
+    finally:
+        cursor.execute("SET unique_checks=1")
+        cursor.execute("SET foreign_key_checks=1")
+        cursor.close()
+        conn.close()
+
+def _create_and_seed(cursor, reset=False):
+    """
+    Syncs and seeds all tables (runs inside setup_database's session).
+    Returns False without touching anything if the schema is already current.
+    """
+    # -----------------------------------------------------
+    # SCHEMA (core tables; order is resolved from the FK graph)
+    # -----------------------------------------------------
+    core_ddl = [
+        # Assets Table (Hierarchical Self-Reference)
+        """
+        CREATE TABLE IF NOT EXISTS assets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            parent_id INT,
+            name VARCHAR(255) NOT NULL,
+            type VARCHAR(50),
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT fk_assets_parent FOREIGN KEY (parent_id) REFERENCES assets(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """,
+
+        # Problems (Problem Management)
+        """
+        CREATE TABLE IF NOT EXISTS problems (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            root_cause_analysis TEXT,
+            status VARCHAR(50) DEFAULT 'Open',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """,
+
+        # Tickets Table
+        """
+        CREATE TABLE IF NOT EXISTS tickets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            asset_id INT NOT NULL,
+            ticket_type VARCHAR(50), -- Incident, Service Request, Change, Problem
+            title VARCHAR(255),
+            description TEXT,
+            status VARCHAR(50) DEFAULT 'Open', 
+            priority VARCHAR(50), 
+            logged_by VARCHAR(100),
+            related_type VARCHAR(50) DEFAULT 'asset',
+            due_date DATETIME, -- V2: SLA Due Date
+            problem_id INT, -- V2: Linked Problem
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_asset_id (asset_id),
+            CONSTRAINT fk_tickets_asset FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
+            CONSTRAINT fk_ticket_problem FOREIGN KEY (problem_id) REFERENCES problems(id) ON DELETE SET NULL
+        ) ENGINE=InnoDB;
+        """,
+
+        # Attachments Table
+        """
+        CREATE TABLE IF NOT EXISTS ticket_attachments (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            ticket_id INT NOT NULL,
+            file_name VARCHAR(255),
+            file_path VARCHAR(500),
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CONSTRAINT fk_attachments_ticket FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """,
+
+        # Policies Table (Organizational Docs)
+        """
+        CREATE TABLE IF NOT EXISTS policies (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            category VARCHAR(100),
+            summary TEXT,
+            content TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_policies_created (created_at DESC)
+        ) ENGINE=InnoDB;
+        """,
+
+        # ISO Controls Master List
+        """
+        CREATE TABLE IF NOT EXISTS iso_controls (
+            id VARCHAR(10) PRIMARY KEY, -- e.g. 'A.5.1'
+            theme VARCHAR(50), -- Organizational, People, Physical, Technological
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """,
+
+        # NIST Controls Master List
+        """
+        CREATE TABLE IF NOT EXISTS nist_controls (
+            id VARCHAR(10) PRIMARY KEY, -- e.g. 'GV.OC-01'
+            function VARCHAR(50), -- Govern, Identify, Protect, Detect, Respond, Recover
+            category VARCHAR(100), -- Organizational Context, Risk Management Strategy, etc.
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """,
+
+        # 4. ITIL V2 Tables (Knowledge Base, SLAs, Problems, Licenses, CAB)
+        
+        # Knowledge Base
+        """
+        CREATE TABLE IF NOT EXISTS knowledge_articles (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            content TEXT,
+            category VARCHAR(100),
+            tags VARCHAR(255),
+            author VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """,
+
+        # SLA Policies
+        """
+        CREATE TABLE IF NOT EXISTS sla_policies (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            priority VARCHAR(50) UNIQUE, -- Critical, High, Medium, Low
+            response_time_minutes INT,
+            resolution_time_minutes INT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """,
+        
+        # Software Licenses
+        """
+        CREATE TABLE IF NOT EXISTS software_licenses (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            software_asset_id INT NOT NULL,
+            license_key VARCHAR(255),
+            vendor VARCHAR(255),
+            total_seats INT DEFAULT 0,
+            used_seats INT DEFAULT 0,
+            expiration_date DATE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """,
+        
+        # Change Approvals (CAB)
+        """
+        CREATE TABLE IF NOT EXISTS change_approvals (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            ticket_id INT NOT NULL,
+            approver_role VARCHAR(100),
+            status VARCHAR(50) DEFAULT 'Pending',
+            comments TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            CONSTRAINT fk_approvals_ticket FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """,
+
+        # Mappings: Asset <-> ISO (Many-to-Many)
+        """
+        CREATE TABLE IF NOT EXISTS asset_controls (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            asset_id INT NOT NULL,
+            control_id VARCHAR(10) NOT NULL,
+            status VARCHAR(50) DEFAULT 'Not Applicable',
+            notes TEXT,
+            linked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
+            FOREIGN KEY (control_id) REFERENCES iso_controls(id) ON DELETE CASCADE,
+            UNIQUE KEY unique_link (asset_id, control_id)
+        ) ENGINE=InnoDB;
+        """,
+
+        # Mappings: Asset <-> NIST (Many-to-Many)
+        """
+        CREATE TABLE IF NOT EXISTS asset_nist_controls (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            asset_id INT NOT NULL,
+            control_id VARCHAR(10) NOT NULL,
+            status VARCHAR(50) DEFAULT 'Not Applicable',
+            notes TEXT,
+            linked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
+            FOREIGN KEY (control_id) REFERENCES nist_controls(id) ON DELETE CASCADE,
+            UNIQUE KEY unique_nist_link (asset_id, control_id)
+        ) ENGINE=InnoDB;
+        """,
+
+        # Mappings: Policy <-> NIST (Many-to-Many)
+        """
+        CREATE TABLE IF NOT EXISTS policy_nist_mappings (
+            policy_id INT,
+            nist_control_id VARCHAR(10),
+            PRIMARY KEY (policy_id, nist_control_id), -- Covers lookups by policy_id
+            INDEX idx_pnm_control (nist_control_id), -- Reverse lookup: policies covering a control
+            FOREIGN KEY (policy_id) REFERENCES policies(id) ON DELETE CASCADE,
+            FOREIGN KEY (nist_control_id) REFERENCES nist_controls(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """,
+
+        # Hierarchy v2.0 Tables (New Strict Schema)
+        # V2 Table 1: Business Services Level 1
+        """
+        CREATE TABLE IF NOT EXISTS kpu_business_services_level1 (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            owner VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """,
+
+        # V2 Table 2: Business Services Level 2 (Child of Level 1)
+        """
+        CREATE TABLE IF NOT EXISTS kpu_business_services_level2 (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            business_service_level1_id INT,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (business_service_level1_id) REFERENCES kpu_business_services_level1(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """,
+
+        # V2 Table 3: Technical Services (Child of Level 2)
+        # NOTE: Was child of 'business_service' (Level 1), now child of 'level 2'
+        """
+        CREATE TABLE IF NOT EXISTS kpu_technical_services (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            business_service_level2_id INT,
+            name VARCHAR(255) NOT NULL,
+            description TEXT,
+            sla_level VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (business_service_level2_id) REFERENCES kpu_business_services_level2(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """,
+
+        # V2 Table 4: Enterprise Assets (Child of Technical Service)
+        """
+        CREATE TABLE IF NOT EXISTS kpu_enterprise_assets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            technical_service_id INT,
+            name VARCHAR(255) NOT NULL,
+            asset_type VARCHAR(100), -- Server, Database, Router, etc.
+            location VARCHAR(100),
+            status VARCHAR(50) DEFAULT 'Active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (technical_service_id) REFERENCES kpu_technical_services(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """,
+
+        # V2 Table 5: Component Assets (Child of Enterprise Asset)
+        """
+        CREATE TABLE IF NOT EXISTS kpu_component_assets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            enterprise_asset_id INT,
+            name VARCHAR(255) NOT NULL,
+            component_type VARCHAR(100), -- Module, Agent, Disk, etc.
+            version VARCHAR(50),
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (enterprise_asset_id) REFERENCES kpu_enterprise_assets(id) ON DELETE CASCADE
+        ) ENGINE=InnoDB;
+        """,
+
+        # KPU Enterprise Software
+        """
+        CREATE TABLE IF NOT EXISTS kpu_enterprise_software (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            asset_id VARCHAR(255),
+            name VARCHAR(255),
+            manufacturer VARCHAR(255),
+            mfa_enabled VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB;
+        """,
+
+        # KPU Enterprise Computing Machines
+        """
+        CREATE TABLE IF NOT EXISTS kpu_enterprise_computing_machines (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            asset_id VARCHAR(255),
+            name VARCHAR(255),
+            ip_address VARCHAR(50),
+            mac_address VARCHAR(50),
+            owner VARCHAR(255),
+            os_type VARCHAR(100),
+            location VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_ecm_mac_ip (mac_address, ip_address), -- Covers the importer's id/MAC/IP prefetch
+            INDEX idx_ecm_ip (ip_address)
+        ) ENGINE=InnoDB;
+        """,
+    ]
+    # Parents before children, derived from the FK references above
+    create_order = order_ddl(core_ddl)
+
+    # Skip the destructive rebuild if this exact schema + seed set is already in place
+    version = schema_version(core_ddl)
+    cursor.execute("CREATE TABLE IF NOT EXISTS schema_meta (version VARCHAR(64) PRIMARY KEY) ENGINE=InnoDB")
+    cursor.execute("SELECT version FROM schema_meta")
+    row = cursor.fetchone()
+    if row and row[0] == version and not reset:
+        print(f"Schema {version[:12]} already up to date. Skipping setup (pass --force-reset to rebuild).")
+        return False
 
     # -----------------------------------------------------
-    # 1. DROP EXISTING TABLES (Reset)
+    # 1. DROP EXISTING TABLES (only with --force-reset)
     # -----------------------------------------------------
-    print("Dropping existing tables...")
-    # Order matters due to Foreign Keys (Child tables first)
+    # Tables wiped by a reset (knowledge/SLA/problem/licence/CAB tables are kept)
     tables_to_drop = [
         "policy_nist_mappings",
         "asset_nist_controls",
@@ -64,199 +754,22 @@ def setup_database():
         "kpu_enterprise_software",
         "kpu_enterprise_computing_machines"
     ]
-    for t in tables_to_drop:
-        cursor.execute(f"DROP TABLE IF EXISTS {t}")
+    if reset:
+        print("Dropping existing tables...")
+        # Children before parents (reverse of create order), then legacy tables
+        declared = [name for name, _ in create_order]
+        drop_order = [t for t in reversed(declared) if t in tables_to_drop]
+        drop_order += [t for t in tables_to_drop if t not in declared]
+        # One round trip (FK checks are already off for the session)
+        drop_sql = "".join(f"DROP TABLE IF EXISTS {t}; " for t in drop_order)
+        for _ in cursor.execute(drop_sql, multi=True):
+            pass
 
     # -----------------------------------------------------
-    # 2. CREATE TABLES
+    # 2. CREATE / MIGRATE TABLES
     # -----------------------------------------------------
-    print("Creating tables...")
-
-    # Assets Table (Hierarchical Self-Reference)
-    cursor.execute("""
-    CREATE TABLE assets (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        parent_id INT,
-        name VARCHAR(255) NOT NULL,
-        type VARCHAR(50),
-        description TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        CONSTRAINT fk_assets_parent FOREIGN KEY (parent_id) REFERENCES assets(id) ON DELETE CASCADE
-    ) ENGINE=InnoDB;
-    """)
-
-    CREATE TABLE tickets (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        asset_id INT NOT NULL,
-        ticket_type VARCHAR(50), -- Incident, Service Request, Change, Problem
-        title VARCHAR(255),
-        description TEXT,
-        status VARCHAR(50) DEFAULT 'Open', 
-        priority VARCHAR(50), 
-        logged_by VARCHAR(100),
-        related_type VARCHAR(50) DEFAULT 'asset',
-        due_date DATETIME, -- V2: SLA Due Date
-        problem_id INT, -- V2: Linked Problem
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-        INDEX idx_asset_id (asset_id),
-        CONSTRAINT fk_tickets_asset FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
-        CONSTRAINT fk_ticket_problem FOREIGN KEY (problem_id) REFERENCES problems(id) ON DELETE SET NULL
-    ) ENGINE=InnoDB;
-    """)
-
-    # Attachments Table
-    cursor.execute("""
-    CREATE TABLE ticket_attachments (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        ticket_id INT NOT NULL,
-        file_name VARCHAR(255),
-        file_path VARCHAR(500),
-        uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        CONSTRAINT fk_attachments_ticket FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
-    ) ENGINE=InnoDB;
-    """)
-
-    # Policies Table (Organizational Docs)
-    cursor.execute("""
-    CREATE TABLE policies (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        category VARCHAR(100),
-        summary TEXT,
-        content TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """)
-
-    # ISO Controls Master List
-    cursor.execute("""
-    CREATE TABLE iso_controls (
-        id VARCHAR(10) PRIMARY KEY, -- e.g. 'A.5.1'
-        theme VARCHAR(50), -- Organizational, People, Physical, Technological
-        description TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """)
-
-    # NIST Controls Master List
-    cursor.execute("""
-    CREATE TABLE nist_controls (
-        id VARCHAR(10) PRIMARY KEY, -- e.g. 'GV.OC-01'
-        function VARCHAR(50), -- Govern, Identify, Protect, Detect, Respond, Recover
-        category VARCHAR(100), -- Organizational Context, Risk Management Strategy, etc.
-        description TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """)
-
-    # 4. ITIL V2 Tables (Knowledge Base, SLAs, Problems, Licenses, CAB)
-    
-    # Knowledge Base
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS knowledge_articles (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        title VARCHAR(255) NOT NULL,
-        content TEXT,
-        category VARCHAR(100),
-        tags VARCHAR(255),
-        author VARCHAR(100),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """)
-
-    # SLA Policies
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS sla_policies (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        priority VARCHAR(50) UNIQUE, -- Critical, High, Medium, Low
-        response_time_minutes INT,
-        resolution_time_minutes INT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """)
-    
-    # Problems (Problem Management)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS problems (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        title VARCHAR(255) NOT NULL,
-        description TEXT,
-        root_cause_analysis TEXT,
-        status VARCHAR(50) DEFAULT 'Open',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """)
-
-    # Software Licenses
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS software_licenses (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        software_asset_id INT NOT NULL,
-        license_key VARCHAR(255),
-        vendor VARCHAR(255),
-        total_seats INT DEFAULT 0,
-        used_seats INT DEFAULT 0,
-        expiration_date DATE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """)
-    
-    # Change Approvals (CAB)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS change_approvals (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        ticket_id INT NOT NULL,
-        approver_role VARCHAR(100),
-        status VARCHAR(50) DEFAULT 'Pending',
-        comments TEXT,
-        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-        CONSTRAINT fk_approvals_ticket FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
-    ) ENGINE=InnoDB;
-    """)
-
-    # Mappings: Asset <-> ISO (Many-to-Many)
-    cursor.execute("""
-    CREATE TABLE asset_controls (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        asset_id INT NOT NULL,
-        control_id VARCHAR(10) NOT NULL,
-        status VARCHAR(50) DEFAULT 'Not Applicable',
-        notes TEXT,
-        linked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
-        FOREIGN KEY (control_id) REFERENCES iso_controls(id) ON DELETE CASCADE,
-        UNIQUE KEY unique_link (asset_id, control_id)
-    ) ENGINE=InnoDB;
-    """)
-
-    # Mappings: Asset <-> NIST (Many-to-Many)
-    cursor.execute("""
-    CREATE TABLE asset_nist_controls (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        asset_id INT NOT NULL,
-        control_id VARCHAR(10) NOT NULL,
-        status VARCHAR(50) DEFAULT 'Not Applicable',
-        notes TEXT,
-        linked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE,
-        FOREIGN KEY (control_id) REFERENCES nist_controls(id) ON DELETE CASCADE,
-        UNIQUE KEY unique_nist_link (asset_id, control_id)
-    ) ENGINE=InnoDB;
-    """)
-
-    # Mappings: Policy <-> NIST (Many-to-Many)
-    cursor.execute("""
-    CREATE TABLE policy_nist_mappings (
-        policy_id INT,
-        nist_control_id VARCHAR(10),
-        PRIMARY KEY (policy_id, nist_control_id),
-        FOREIGN KEY (policy_id) REFERENCES policies(id) ON DELETE CASCADE,
-        FOREIGN KEY (nist_control_id) REFERENCES nist_controls(id) ON DELETE CASCADE
-    ) ENGINE=InnoDB;
-    """)
-
-    conn.commit()
+    print("Syncing tables...")
+    created = sync_schema(cursor, create_order)
 
     # -----------------------------------------------------
     # 3. SEED DATA (KPU Default Assets)
@@ -264,132 +777,77 @@ def setup_database():
     # This section pre-populates the database with a standard hierarchy
     # for a telecommunications company (KPU).
     
+    # Only freshly created tables are seeded, so existing data is never duplicated
+    if "assets" in created:
+        _seed_assets(cursor)
+
+    # --- SEED ISO CONTROLS (Common subset) ---
+    if "iso_controls" in created:
+        print("Seeding ISO 27001 Controls...")
+        # Subset of ISO controls to get started
+        load_seed_csv(cursor, "iso_controls.csv", "iso_controls", ["id", "theme", "description"])
+
+    # --- SEED NIST CONTROLS (Common subset) ---
+    if "nist_controls" in created:
+        print("Seeding NIST CSF 2.0 Controls...")
+        # Subset of NIST controls to get started
+        load_seed_csv(cursor, "nist_controls.csv", "nist_controls", ["id", "function", "category", "description"])
+
+    # =============================================================================
+    # 4. SEED DATA FOR V2.0
+    # =============================================================================
+    # The whole chain is one multi-statement script: each level is a multi-row
+    # INSERT, and the parent for the next level is captured server-side with
+    # LAST_INSERT_ID() (= ID of that INSERT's first row), so no IDs travel
+    # back to Python between levels.
+    # Only seed if empty to prevent duplicates on re-run
+    # Check Level 1 table
+    cursor.execute("SELECT COUNT(*) FROM kpu_business_services_level1")
+    if cursor.fetchone()[0] == 0:
+        print(" Seeding Hierarchy v2.0 Data...")
+        
+        statements, params = [], []
+        for sql, rows, parent_var, capture_var in V2_SEED_LEVELS:
+            values, level_params = values_clause(rows, parent_var)
+            statements.append(sql + values)
+            params.extend(level_params)
+            if capture_var:
+                statements.append(f"SET {capture_var} = LAST_INSERT_ID()")
+        for _ in cursor.execute("; ".join(statements), params, multi=True):
+            pass
+
+    # Record the schema this run produced (committed with the seed data)
+    cursor.execute("DELETE FROM schema_meta")
+    cursor.execute("INSERT INTO schema_meta (version) VALUES (%s)", (version,))
+    return True
+
+def _seed_assets(cursor):
+    """Seeds the KPU asset hierarchy plus the Layer 7 / SafeList CSV imports."""
     # --- SEED ASSETS ---
     print("Seeding Assets...")
-    def insert_node(name, parent_id, node_type, description=""):
-        """Helper to insert an asset node and return its ID for parenting."""
-        cursor.execute(
-            "INSERT INTO assets (name, parent_id, type, description) VALUES (%s, %s, %s, %s)",
-            (name, parent_id, node_type, description)
-        )
-        return cursor.lastrowid
-
-    # Root
-    root_id = insert_node("KPU Telecommunications", None, "Company")
-
-    # Res Services
-    res_id = insert_node("Residential Services", root_id, "Category")
-    res_net_id = insert_node("Internet Service", res_id, "Service")
-    insert_node("Fiber Optic Broadband", res_net_id, "Offering", "Symmetric high-speed plans")
-    insert_node("Cable Internet", res_net_id, "Offering", "Alternative where fiber not available")
-    insert_node("Managed WiFi", res_net_id, "Offering", "Routers and whole-home coverage")
-    insert_node("Affordable Connectivity Program", res_net_id, "Offering")
-
-    res_voice_id = insert_node("Voice Service", res_id, "Service")
-    res_phone_id = insert_node("Basic Phone Line", res_voice_id, "Offering")
-    for feat in ["Caller ID", "Call Waiting", "Call Forwarding", "Three-Way Calling", "Voice Mail"]:
-        insert_node(feat, res_phone_id, "Feature")
-
-    res_tv_id = insert_node("Television Service", res_id, "Service")
-    insert_node("Cable TV Packages", res_tv_id, "Offering")
-    insert_node("Local Channels & On-Demand", res_tv_id, "Offering", "Includes KPUTv+")
-    insert_node("Streaming Integration", res_tv_id, "Offering")
-
-    # Bus Services
-    bus_id = insert_node("Business Services", root_id, "Category")
-    bus_net_id = insert_node("Internet Service", bus_id, "Service")
-    insert_node("Dedicated Fiber Optic", bus_net_id, "Offering", "Symmetric, unlimited")
-    insert_node("Hosted Business Solutions", bus_net_id, "Offering", "Data center backup")
-
-    bus_voice_id = insert_node("Voice Service", bus_id, "Service")
-    insert_node("Business Phone Lines", bus_voice_id, "Offering")
-    insert_node("Hosted VoIP", bus_voice_id, "Offering", "Advanced phone systems")
-
-    bus_add_id = insert_node("Additional Business Solutions", bus_id, "Service")
-    insert_node("Wireless Internet Options", bus_add_id, "Offering")
-    insert_node("Security Cameras & Monitoring", bus_add_id, "Offering")
-    insert_node("Custom Telecom Services", bus_add_id, "Offering", "Server backup, productivity tools")
-
-    # Infrastructure
-    infra_id = insert_node("KPU Infrastructure Assets", None, "Category", "Technical Asset Hierarchy")
-    
-    # Network Infra
-    core_net_id = insert_node("Network Infrastructure", infra_id, "System")
-    cn_id = insert_node("Core Network", core_net_id, "Sub-System")
-    insert_node("Headend/Central Office", cn_id, "Facility", "Main facility in Ketchikan")
-    insert_node("Core Routers & Switches", cn_id, "Asset")
-    insert_node("Optical Line Terminal (OLT)", cn_id, "Asset")
-    insert_node("Servers & Data Center HW", cn_id, "Asset")
-    insert_node("Backup Power Systems", cn_id, "Asset", "Generators, batteries")
-
-    trans_id = insert_node("Transport/Backbone Network", core_net_id, "Sub-System")
-    insert_node("Fiber Optic Cables (Trunk)", trans_id, "Asset", "Underground/aerial ducts")
-    insert_node("Fiber Strands & Splices", trans_id, "Asset")
-    insert_node("Manholes & Vaults", trans_id, "Asset")
-    insert_node("Submarine Cables", trans_id, "Asset")
-
-    # Distribution
-    dist_id = insert_node("Distribution Network", infra_id, "System")
-    osp_id = insert_node("Plant (OSP)", dist_id, "Sub-System")
-    insert_node("Fiber Distribution Hubs (FDH)", osp_id, "Asset")
-    insert_node("Poles & Aerial Infra", osp_id, "Asset")
-    insert_node("Underground Conduits", osp_id, "Asset")
-    insert_node("Splitters & Dist Points", osp_id, "Asset")
-
-    # Access
-    acc_id = insert_node("Access Network", infra_id, "System")
-    insert_node("Outside Fiber Drops", acc_id, "Asset", "To Premises")
-    insert_node("Optical Network Terminals (ONT)", acc_id, "Asset", "At customer site")
-
-    # CPE
-    cpe_id = insert_node("Customer Premises Equipment (CPE)", acc_id, "Sub-System")
-    rcpe_id = insert_node("Residential CPE", cpe_id, "Group")
-    insert_node("Modems/Routers", rcpe_id, "Asset", "Managed WiFi")
-    insert_node("Set-Top Boxes", rcpe_id, "Asset")
-    insert_node("Phone Adapters", rcpe_id, "Asset", "VoIP/Landline")
-
-    bcpe_id = insert_node("Business CPE", cpe_id, "Group")
-    insert_node("Dedicated Routers/Switches", bcpe_id, "Asset")
-    insert_node("IP Phones & PBX", bcpe_id, "Asset")
-    insert_node("Security Cameras (CPE)", bcpe_id, "Asset")
-
-    # Support
-    supp_id = insert_node("Support Assets", infra_id, "System")
-    insert_node("Vehicles & Tools", supp_id, "Group", "Field technician fleet")
-    insert_node("Test Equipment", supp_id, "Group", "OTDR, etc.")
-    insert_node("Spare Parts Inventory", supp_id, "Group", "Cables, connectors")
-
-    # Enterprise IT
-    ent_id = insert_node("Enterprise IT", infra_id, "System")
-    ent_sw_id = insert_node("Enterprise Software", ent_id, "Sub-System")
-    insert_node("Microsoft Office 365", ent_sw_id, "Asset")
-    insert_node("Billing System", ent_sw_id, "Asset")
-    insert_node("CRM", ent_sw_id, "Asset")
-    
-    ent_hw_id = insert_node("Enterprise Hardware", ent_id, "Sub-System")
-    insert_node("Employee Laptops", ent_hw_id, "Group")
-    insert_node("Office Printers", ent_hw_id, "Group")
+    load_seed_csv(cursor, "assets.csv", "assets", ["id", "parent_id", "name", "type", "description"])
+    ent_sw_id = SEED_ENT_SW_ID
+    ent_hw_id = SEED_ENT_HW_ID
+
+    # CSV imports are leaf nodes under fixed parents, so rows are streamed
+    # straight into one bulk load (no per-node lastrowid round trip needed)
 
     # --- IMPORT LAYER 7 ASSETS (From CSV) ---
     print("Importing Assets from CSVs...")
     import csv
 
-    # 1. Layer 7 Software
+    # 1. Layer 7 Software (columns: Asset_ID, Name, Manufacturer, MFA Enabled)
     csv_1 = "KPU_MasterAsset_List - Layer7List.csv"
     try:
-        with open(csv_1, mode='r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            next(reader) # Skip Header
-            
-            count = 0
-            for row in reader:
-                if len(row) >= 2:
-                    name = row[1].strip()
-                    cat_desc = row[2].strip() if len(row) > 2 else ""
-                    
-                    if name:
-                        insert_node(name, ent_sw_id, "Asset", description=cat_desc)
-                        count += 1
+        with open(csv_1, mode='r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            require_columns(reader, {"Name", "Manufacturer"}, csv_1)
+            nodes = (
+                (name, ent_sw_id, "Asset", (row.get("Manufacturer") or "").strip())
+                for row in reader
+                if (name := (row.get("Name") or "").strip())
+            )
+            count = load_asset_nodes(cursor, nodes)
             print(f"Successfully imported {count} Layer 7 Software assets.")
             
     except FileNotFoundError:
@@ -400,24 +858,16 @@ def setup_database():
     # 2. SafeList Devices (Hardware)
     csv_2 = "KPU_MasterAsset_List - SafeListDevices.csv"
     try:
-        with open(csv_2, mode='r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            # Check headers or skip
-            # Assuming format: User, Device Name, Model, Serial, etc. based on typical device lists
-            # We'll inspect the first row to be sure, but standard DictReader might be safer if headers exist
-            headers = next(reader, None)
-            
-            count = 0
-            for row in reader:
-                # Based on file inspection (User: Machine Name, Device Name)
-                # Adjust index based on actual file content from next step if needed, 
-                # but generically mapping col 1 or 2 is safe for now.
-                # Let's map 'Device Name' (col 0 or 1) as name.
-                if len(row) >= 1:
-                    d_name = row[0].strip()
-                    if d_name:
-                         insert_node(d_name, ent_hw_id, "Asset", description="Imported Device")
-                         count += 1
+        with open(csv_2, mode='r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.DictReader(f)
+            # Device name lives in 'Asset_Name' (col 0 is LastUpdateBy, the editor)
+            require_columns(reader, {"Asset_Name"}, csv_2)
+            nodes = (
+                (d_name, ent_hw_id, "Asset", "Imported Device")
+                for row in reader
+                if (d_name := (row.get("Asset_Name") or "").strip())
+            )
+            count = load_asset_nodes(cursor, nodes)
             print(f"Successfully imported {count} SafeList Devices.")
 
     except FileNotFoundError:
@@ -425,204 +875,5 @@ def setup_database():
     except Exception as e:
          print(f"Error importing {csv_2}: {e}")
 
-    # --- SEED ISO CONTROLS (Common subset) ---
-    print("Seeding ISO 27001 Controls...")
-    # Subset of ISO controls to get started
-    iso_controls = [
-        ("A.5.1", "Organizational", "Policies for information security"),
-        ("A.5.8", "Organizational", "Information security in project management"),
-        ("A.6.1", "People", "Screening"),
-        ("A.7.1", "Physical", "Physical security perimeters"),
-        ("A.8.1", "Technological", "User endpoint devices"),
-        ("A.8.5", "Technological", "Secure authentication"),
-        ("A.8.15", "Technological", "Logging"),
-        ("A.8.20", "Technological", "Networks security")
-    ]
-    cursor.executemany("INSERT INTO iso_controls (id, theme, description) VALUES (%s, %s, %s)", iso_controls)
-
-    # --- SEED NIST CONTROLS (Common subset) ---
-    print("Seeding NIST CSF 2.0 Controls...")
-    # Subset of NIST controls to get started
-    nist_controls = [
-        ("GV.OC-01", "Govern", "Organizational Context", "Organizational mission, objectives, and high-level priorities are understood."),
-        ("GV.PO-01", "Govern", "Policy", "Organizational cybersecurity policies are established, communicated, and enforced."),
-        ("ID.AM-01", "Identify", "Asset Management", "Hardware, software, and services are inventoried."),
-        ("PR.AA-01", "Protect", "Identity Management", "Identities and credentials are managed."),
-        ("PR.DS-01", "Protect", "Data Security", "Data-at-rest is protected."),
-        ("DE.CM-01", "Detect", "Continuous Monitoring", "The network is monitored to detect potential cybersecurity events."),
-        ("RS.MA-01", "Respond", "Incident Management", "Incidents are triaged and prioritized."),
-        ("RC.RP-01", "Recover", "Incident Recovery", "Recovery plan is executed.")
-    ]
-    cursor.executemany("INSERT INTO nist_controls (id, function, category, description) VALUES (%s, %s, %s, %s)", nist_controls)
-
-    # =============================================================================
-    # 2. HIERARCHY V2.0 TABLES (New Strict Schema)
-    # =============================================================================
-    print(" Creating Hierarchy v2.0 Tables...")
-    
-    # Table 1: Business Services Level 1
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS kpu_business_services_level1 (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        description TEXT,
-        owner VARCHAR(255),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    ) ENGINE=InnoDB;
-    """)
-
-    # Table 2: Business Services Level 2 (Child of Level 1)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS kpu_business_services_level2 (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        business_service_level1_id INT,
-        name VARCHAR(255) NOT NULL,
-        description TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (business_service_level1_id) REFERENCES kpu_business_services_level1(id) ON DELETE CASCADE
-    ) ENGINE=InnoDB;
-    """)
-    
-    # Table 3: Technical Services (Child of Level 2)
-    # NOTE: Was child of 'business_service' (Level 1), now child of 'level 2'
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS kpu_technical_services (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        business_service_level2_id INT,
-        name VARCHAR(255) NOT NULL,
-        description TEXT,
-        sla_level VARCHAR(50),
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (business_service_level2_id) REFERENCES kpu_business_services_level2(id) ON DELETE CASCADE
-    ) ENGINE=InnoDB;
-    """)
-    
-    # Table 4: Enterprise Assets (Child of Technical Service)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS kpu_enterprise_assets (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        technical_service_id INT,
-        name VARCHAR(255) NOT NULL,
-        asset_type VARCHAR(100), -- Server, Database, Router, etc.
-        location VARCHAR(100),
-        status VARCHAR(50) DEFAULT 'Active',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (technical_service_id) REFERENCES kpu_technical_services(id) ON DELETE CASCADE
-    ) ENGINE=InnoDB;
-    """)
-    
-    # Table 5: Component Assets (Child of Enterprise Asset)
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS kpu_component_assets (
-        id INT AUTO_INCREMENT PRIMARY KEY,
-        enterprise_asset_id INT,
-        name VARCHAR(255) NOT NULL,
-        component_type VARCHAR(100), -- Module, Agent, Disk, etc.
-        version VARCHAR(50),
-        description TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (enterprise_asset_id) REFERENCES kpu_enterprise_assets(id) ON DELETE CASCADE
-    ) ENGINE=InnoDB;
-    """)
-    
-    # =============================================================================
-    # 3. SEED DATA FOR V2.0
-    # =============================================================================
-    # Only seed if empty to prevent duplicates on re-run
-    # Check Level 1 table
-    cursor.execute("SELECT COUNT(*) FROM kpu_business_services_level1")
-    if cursor.fetchone()[0] == 0:
-        print(" Seeding Hierarchy v2.0 Data...")
-        
-        # 1. Business Services Level 1
-        l1_data = [
-            ("Corporate Operations", "Core business functions", "COO"),
-            ("Finance Org", "Financial management", "CFO")
-        ]
-        for name, desc, owner in l1_data:
-            cursor.execute("INSERT INTO kpu_business_services_level1 (name, description, owner) VALUES (%s, %s, %s)", (name, desc, owner))
-            
-        # Get L1 ID
-        cursor.execute("SELECT id FROM kpu_business_services_level1 WHERE name='Corporate Operations'")
-        l1_ops_id = cursor.fetchone()[0]
-        
-        # 2. Business Services Level 2
-        l2_data = [
-            (l1_ops_id, "Corporate Communications", "Internal messaging and email services"),
-            (l1_ops_id, "Facilities Management", "Physical office management")
-        ]
-        for pid, name, desc in l2_data:
-             cursor.execute("INSERT INTO kpu_business_services_level2 (business_service_level1_id, name, description) VALUES (%s, %s, %s)", (pid, name, desc))
-
-        # Get L2 ID
-        cursor.execute("SELECT id FROM kpu_business_services_level2 WHERE name='Corporate Communications'")
-        l2_comm_id = cursor.fetchone()[0]
-        
-        # 3. Technical Services (Now linked to Level 2)
-        ts_data = [
-            (l2_comm_id, "Exchange Email Service", "Core email routing and storage", "Gold"),
-            (l2_comm_id, "Teams Collaboration", "Chat and Video conferencing", "Silver")
-        ]
-        for pid, name, desc, sla in ts_data:
-            cursor.execute("INSERT INTO kpu_technical_services (business_service_level2_id, name, description, sla_level) VALUES (%s, %s, %s, %s)", (pid, name, desc, sla))
-            
-        # Get IDs
-        cursor.execute("SELECT id FROM kpu_technical_services WHERE name='Exchange Email Service'")
-        ts_email_id = cursor.fetchone()[0]
-        
-        # 4. Enterprise Assets
-        ea_data = [
-            (ts_email_id, "EXCH-SVR-01", "Server", "NY Data Center"),
-            (ts_email_id, "EXCH-SVR-02", "Server", "London Data Center"),
-            (ts_email_id, "Email Gateway Appliance", "Appliance", "Cloud")
-        ]
-        for pid, name, atype, loc in ea_data:
-            cursor.execute("INSERT INTO kpu_enterprise_assets (technical_service_id, name, asset_type, location) VALUES (%s, %s, %s, %s)", (pid, name, atype, loc))
-            
-        # Get IDs
-        cursor.execute("SELECT id FROM kpu_enterprise_assets WHERE name='EXCH-SVR-01'")
-        ea_svr_id = cursor.fetchone()[0]
-        
-        # 5. Component Assets
-        ca_data = [
-            (ea_svr_id, "Transport Agent", "Software Module", "v15.2"),
-            (ea_svr_id, "C: Drive Volume", "Storage", "500GB SSD"),
-            (ea_svr_id, "Network Interface Card", "Hardware", "10GbE")
-        ]
-        for pid, name, ctype, ver in ca_data:
-            cursor.execute("INSERT INTO kpu_component_assets (enterprise_asset_id, name, component_type, version) VALUES (%s, %s, %s, %s)", (pid, name, ctype, ver))
-
-        # 16. KPU Enterprise Software
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS kpu_enterprise_software (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            asset_id VARCHAR(255),
-            name VARCHAR(255),
-            manufacturer VARCHAR(255),
-            mfa_enabled VARCHAR(50),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        ) ENGINE=InnoDB;
-        """)
-
-        # 17. KPU Enterprise Computing Machines
-        cursor.execute("""
-        CREATE TABLE IF NOT EXISTS kpu_enterprise_computing_machines (
-            id INT AUTO_INCREMENT PRIMARY KEY,
-            asset_id VARCHAR(255),
-            name VARCHAR(255),
-            ip_address VARCHAR(50),
-            mac_address VARCHAR(50),
-            owner VARCHAR(255),
-            os_type VARCHAR(100),
-            location VARCHAR(255),
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        ) ENGINE=InnoDB;
-        """)
-
-    conn.commit()
-    print("Database Setup Complete.")
-    cursor.close()
-    conn.close()
-
 if __name__ == "__main__":
-    setup_database()
+    setup_database(reset="--force-reset" in sys.argv)
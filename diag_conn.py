@@ -1,7 +1,10 @@
-
+import functools
 import mysql.connector
+from mysql.connector import pooling
 import os
+import statistics
 import sys
+import time
 import toml
 import socket
 
@@ -9,69 +12,120 @@ import socket
 sys.path.append(os.getcwd())
 from utils.sshtunnel_helper import SSHTunnel
 
-def test_connectivity():
-    secrets_path = ".streamlit/secrets.toml"
-    if not os.path.exists(secrets_path):
-        print("Error: .streamlit/secrets.toml not found")
-        return
+SECRETS_PATH = ".streamlit/secrets.toml"
+PROBE_SAMPLES = 20 # SELECT 1 round trips per target
 
-    secrets = toml.load(secrets_path)
-    
-    def connect_via_ssh(config, ssh_cfg):
-        tunnel = None
-        try:
-            print(f"--- Testing SSH Tunnel to {ssh_cfg['host']} ---")
-            tunnel = SSHTunnel(
-                ssh_host=ssh_cfg['host'],
-                ssh_user=ssh_cfg['user'],
-                ssh_password=ssh_cfg['password'],
+@functools.lru_cache(maxsize=1)
+def load_secrets():
+    """Parses secrets.toml once per process. Returns None if it is missing."""
+    if not os.path.exists(SECRETS_PATH):
+        return None
+    return toml.load(SECRETS_PATH)
+
+def tcp_reachable(host, port, timeout=2):
+    """Fast TCP pre-check so unreachable hosts fail before the MySQL handshake."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+class ConnectionProbe:
+    """
+    One diagnostic target. The SSH tunnel (if any) and a small connection pool
+    are created lazily and reused across every probe against this target.
+    """
+    def __init__(self, label, config, ssh_cfg=None):
+        self.label = label
+        self.config = config
+        self.ssh_cfg = ssh_cfg
+        self.tunnel = None
+        self.pool = None
+
+    def _endpoint(self):
+        """Returns (host, port) for MySQL, starting the SSH tunnel on first use."""
+        if not self.ssh_cfg:
+            return self.config['host'], self.config.get('port', 3306)
+        if self.tunnel is None:
+            print(f"--- Testing SSH Tunnel to {self.ssh_cfg['host']} ---")
+            self.tunnel = SSHTunnel(
+                ssh_host=self.ssh_cfg['host'],
+                ssh_user=self.ssh_cfg['user'],
+                ssh_password=self.ssh_cfg['password'],
                 remote_bind_address=('127.0.0.1', 3306),
-                ssh_port=ssh_cfg.get('port', 22)
+                ssh_port=self.ssh_cfg.get('port', 22)
             )
-            local_port = tunnel.start()
-            print(f"Tunnel established on port {local_port}")
-            
-            print(f"--- Testing MySQL Connection via Tunnel to {config['database']} ---")
-            conn = mysql.connector.connect(
-                host='127.0.0.1',
-                user=config['user'],
-                password=config['password'],
-                database=config['database'],
-                port=local_port,
+            self.tunnel.start() # Sets tunnel.local_port
+            print(f"Tunnel established on port {self.tunnel.local_port}")
+        return '127.0.0.1', self.tunnel.local_port
+
+    def get_pool(self):
+        if self.pool is None:
+            host, port = self._endpoint()
+            if not tcp_reachable(host, port):
+                raise ConnectionError(f"{host}:{port} is not reachable")
+            self.pool = pooling.MySQLConnectionPool(
+                pool_name="diag_" + "".join(c if c.isalnum() else "_" for c in self.label.lower()),
+                pool_size=2,
+                host=host,
+                user=self.config['user'],
+                password=self.config['password'],
+                database=self.config['database'],
+                port=port,
                 connection_timeout=5
             )
-            if conn.is_connected():
-                print("SUCCESS: Connected to Cloud (Primary via SSH)")
-                conn.close()
-            tunnel.stop()
-        except Exception as e:
-            print(f"FAILED: SSH/Primary Connection: {e}")
-            if tunnel: tunnel.stop()
+        return self.pool
 
-    def connect_direct(config, label):
+    def run(self, samples=PROBE_SAMPLES):
         try:
-            print(f"--- Testing Direct MySQL Connection to {config['host']} ({label}) ---")
-            conn = mysql.connector.connect(
-                host=config['host'],
-                user=config['user'],
-                password=config['password'],
-                database=config['database'],
-                port=config.get('port', 3306),
-                connection_timeout=5
-            )
-            if conn.is_connected():
-                print(f"SUCCESS: Connected to Cloud ({label})")
-                conn.close()
+            print(f"--- Testing MySQL Connection to {self.config['database']} ({self.label}) ---")
+            conn = self.get_pool().get_connection()
+            try:
+                if not conn.is_connected():
+                    return
+                print(f"SUCCESS: Connected to Cloud ({self.label})")
+                cursor = conn.cursor()
+                timings = []
+                for _ in range(samples):
+                    start = time.perf_counter()
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+                    timings.append((time.perf_counter() - start) * 1000)
+                cursor.close()
+                timings.sort()
+                p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+                print(f"Latency over {samples} x SELECT 1: min {timings[0]:.1f} ms, "
+                      f"median {statistics.median(timings):.1f} ms, p99 {p99:.1f} ms")
+            finally:
+                conn.close() # Returns it to the pool
         except Exception as e:
-            print(f"FAILED: {label} Connection: {e}")
+            print(f"FAILED: {self.label} Connection: {e}")
+
+    def close(self):
+        if self.tunnel:
+            self.tunnel.stop()
+            self.tunnel = None
+
+def test_connectivity():
+    secrets = load_secrets()
+    if secrets is None:
+        print("Error: .streamlit/secrets.toml not found")
+        return
 
+    probes = []
     # Test Primary (with SSH)
     if "mysql" in secrets and "ssh" in secrets:
-        connect_via_ssh(secrets["mysql"], secrets["ssh"])
-    
+        probes.append(ConnectionProbe("Primary via SSH", secrets["mysql"], secrets["ssh"]))
+
     # Test Backup (Direct)
     if "mysql_backup" in secrets:
-        connect_direct(secrets["mysql_backup"], "Backup")
+        probes.append(ConnectionProbe("Backup", secrets["mysql_backup"]))
+
+    for probe in probes:
+        try:
+            probe.run()
+        finally:
+            probe.close()
 
 if __name__ == "__main__":
     test_connectivity()
@@ -1,7 +1,11 @@
 import csv
 import sys
 import os
-from database_manager import DatabaseManager
+import functools
+from database_manager import DatabaseManager, _mysql_to_sqlite
+
+BATCH_SIZE = 1000 # Rows per execute_many call
+PROGRESS_EVERY = 1000 # Rows between progress lines (no per-row output)
 
 # =============================================================================
 # Script: Discovery Import
@@ -11,6 +15,27 @@ from database_manager import DatabaseManager
 # Upsert Logic: specific to Computing Machines
 # =============================================================================
 
+SQL_SELECT_MACHINES = "SELECT id, mac_address, ip_address FROM kpu_enterprise_computing_machines"
+# SQLite is in-process, so per-row UPDATEs cost no round trips
+SQL_UPDATE_MACHINE = "UPDATE kpu_enterprise_computing_machines SET name=%s, ip_address=%s, mac_address=%s, os_type=%s, location=%s WHERE id=%s"
+SQL_INSERT_MACHINE = "INSERT INTO kpu_enterprise_computing_machines (name, ip_address, mac_address, os_type, location, created_at) VALUES (%s, %s, %s, %s, %s, NOW())"
+
+@functools.lru_cache(maxsize=None)
+def update_join_sql(n):
+    """
+    MySQL UPDATE for n machines in one statement: the batch is joined in as a
+    derived table on id, so (unlike an upsert) an id deleted since the prefetch
+    simply matches nothing instead of creating a row. Parameters are the
+    SQL_UPDATE_MACHINE tuples, flattened.
+    """
+    first = "SELECT %s AS name, %s AS ip_address, %s AS mac_address, %s AS os_type, %s AS location, %s AS id"
+    rows = " UNION ALL ".join([first] + ["SELECT %s, %s, %s, %s, %s, %s"] * (n - 1))
+    return (
+        f"UPDATE kpu_enterprise_computing_machines m JOIN ({rows}) v ON m.id = v.id "
+        "SET m.name=v.name, m.ip_address=v.ip_address, m.mac_address=v.mac_address, "
+        "m.os_type=v.os_type, m.location=v.location"
+    )
+
 def import_csv(file_path):
     print(f"--- Starting Import from {file_path} ---")
     
@@ -20,65 +45,117 @@ def import_csv(file_path):
 
     db = DatabaseManager()
     
+    # One connection for the prefetch and every write: the ids we update must
+    # come from the database we write to, whatever db.mode does meanwhile
+    conn = db._get_cloud_conn()
+    is_cloud = conn is not None
+    if not is_cloud:
+        conn = db._get_local_conn()
+    cursor = conn.cursor()
+    
     count_new = 0
     count_upd = 0
+    count_skip = 0
     
     try:
-        with open(file_path, mode='r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
+        # Prefetch existing machines once; per-row lookups below are dict hits
+        cursor.execute(SQL_SELECT_MACHINES)
+        existing_rows = cursor.fetchall()
+        mac_index = {mac: mid for mid, mac, ip in existing_rows if mac}
+        ip_index = {ip: mid for mid, mac, ip in existing_rows if ip}
+        # Current (mac, ip) per machine, so keys a row replaces can be dropped from the indexes
+        keys_of = {mid: (mac, ip) for mid, mac, ip in existing_rows}
+        
+        # New machines are collected here and inserted after the scan. The indexes
+        # map their MAC/IP to ("new", position) so later duplicates in the same CSV
+        # update the pending row instead of creating a second machine.
+        new_rows = []
+        updates = [] # Parameter tuples for existing machines, applied after the scan
+        
+        with open(file_path, mode='r', encoding='utf-8-sig', newline='') as f:
+            # Plain csv.reader: rows stay lists, fields are read by header position
+            # (no per-row dict as with DictReader)
+            reader = csv.reader(f)
             
             # Normalize headers if needed (strip spaces)
-            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+            header = [name.strip() for name in next(reader, [])]
+            col = {name: i for i, name in enumerate(header)}
             
-            for row in reader:
-                ip = row.get("ip_address", "").strip()
-                mac = row.get("mac_address", "").strip()
-                host = row.get("hostname", "").strip()
-                os_type = row.get("os_type", "").strip()
-                loc = row.get("location", "Unknown Location")
+            def field(row, name, default=""):
+                i = col.get(name)
+                return row[i] if i is not None and i < len(row) else default
+            
+            for i, row in enumerate(reader, 1):
+                if i % PROGRESS_EVERY == 0:
+                    print(f"\r{i} rows processed", end='', flush=True)
+                
+                ip = field(row, "ip_address").strip()
+                mac = field(row, "mac_address").strip()
+                host = field(row, "hostname").strip()
+                os_type = field(row, "os_type").strip()
+                loc = field(row, "location", "Unknown Location")
                 
                 if not host or not ip:
-                    print(f"Skipping row missing host/ip: {row}")
+                    count_skip += 1 # Missing host/ip
                     continue
                 
                 # Check exist by MAC or IP
-                existing = None
-                if mac:
-                    res = db.execute(f"SELECT id FROM kpu_enterprise_computing_machines WHERE mac_address='{mac}'", fetch=True)
-                    if res: existing = res[0]
+                existing = (mac_index.get(mac) if mac else None) or ip_index.get(ip)
                 
-                if not existing and ip:
-                    res = db.execute(f"SELECT id FROM kpu_enterprise_computing_machines WHERE ip_address='{ip}'", fetch=True)
-                    if res: existing = res[0]
-                    
-                if existing:
+                if isinstance(existing, tuple):
+                    # Duplicate of a machine created earlier in this file
+                    new_rows[existing[1]] = (host, ip, mac, os_type, loc)
+                    count_upd += 1
+                elif existing:
                     # UPDATE
-                    eid = existing['id']
-                    print(f"Updating {host} (ID: {eid})...")
-                    if db.mode == "CLOUD":
-                        sql = "UPDATE kpu_enterprise_computing_machines SET name=%s, ip_address=%s, mac_address=%s, os_type=%s, location=%s WHERE id=%s"
-                        db.execute(sql, (host, ip, mac, os_type, loc, eid))
-                    else:
-                        sql = "UPDATE kpu_enterprise_computing_machines SET name=?, ip_address=?, mac_address=?, os_type=?, location=? WHERE id=?"
-                        db.execute(sql, (host, ip, mac, os_type, loc, eid))
+                    eid = existing
+                    updates.append((host, ip, mac, os_type, loc, eid))
                     count_upd += 1
                 else:
-                    # INSERT
-                    print(f"Creating New Asset: {host}...")
-                    if db.mode == "CLOUD":
-                        sql = "INSERT INTO kpu_enterprise_computing_machines (name, ip_address, mac_address, os_type, location, created_at) VALUES (%s, %s, %s, %s, %s, NOW())"
-                        db.execute(sql, (host, ip, mac, os_type, loc))
-                    else:
-                        sql = "INSERT INTO kpu_enterprise_computing_machines (name, ip_address, mac_address, os_type, location, created_at) VALUES (?, ?, ?, ?, ?, datetime('now'))"
-                        db.execute(sql, (host, ip, mac, os_type, loc))
+                    new_rows.append((host, ip, mac, os_type, loc))
+                    existing = ("new", len(new_rows) - 1)
                     count_new += 1
+                
+                # Keep the indexes current for later rows in the same CSV: a MAC/IP
+                # this row changed must no longer resolve to the machine
+                old_mac, old_ip = keys_of.get(existing, (None, None))
+                if old_mac and old_mac != mac and mac_index.get(old_mac) == existing:
+                    del mac_index[old_mac]
+                if old_ip and old_ip != ip and ip_index.get(old_ip) == existing:
+                    del ip_index[old_ip]
+                keys_of[existing] = (mac, ip)
+                if mac: mac_index[mac] = existing
+                ip_index[ip] = existing
+        
+        # UPDATE + INSERT in BATCH_SIZE batches on the same connection, committed
+        # once: a failing batch rolls back the whole file
+        insert_sql = SQL_INSERT_MACHINE if is_cloud else _mysql_to_sqlite(SQL_INSERT_MACHINE)
+        label, start, rows = "commit", 0, ()
+        try:
+            for label, rows in (("update", updates), ("insert", new_rows)):
+                for start in range(0, len(rows), BATCH_SIZE):
+                    batch = rows[start:start + BATCH_SIZE]
+                    if label == "insert":
+                        cursor.executemany(insert_sql, batch)
+                    elif is_cloud:
+                        cursor.execute(update_join_sql(len(batch)), [v for row in batch for v in row])
+                    else:
+                        cursor.executemany(_mysql_to_sqlite(SQL_UPDATE_MACHINE), batch)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print(f"\nImport Failed: {label} batch at row {start} of {len(rows)}; nothing was written.")
+            raise
                     
-        print(f"--- Import Complete ---")
+        print(f"\n--- Import Complete ---")
         print(f"Created: {count_new}")
         print(f"Updated: {count_upd}")
+        print(f"Skipped (missing host/ip): {count_skip}")
         
     except Exception as e:
         print(f"Import Failed: {e}")
+    finally:
+        conn.close()
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -1,13 +1,37 @@
 
+from contextlib import closing
 import pandas as pd
-from database_manager import DatabaseManager
+from database_manager import DatabaseManager, _mysql_to_sqlite
+from utils.csv_import import BATCH_SIZE, CHUNK_ROWS, clean_column, cleaned_chunks
 import streamlit as st
 
+def clean_rows(df):
+    """Cleans one chunk (vectorized over whole columns) into insert-ready tuples."""
+    name = clean_column(df, 'Asset_Name')
+    # If no name, fall back to the EndPoint Name
+    name = name.mask(name == '', clean_column(df, 'EndPoint Name'))
+    # Location logic: prioritize last_location
+    loc = clean_column(df, 'last_location')
+    loc = loc.mask(loc == '', clean_column(df, 'Location'))
+    
+    cleaned = pd.DataFrame({
+        'asset_id': clean_column(df, 'Asset_ID'),
+        'name': name,
+        'ip_address': clean_column(df, 'Primary IP Address'),
+        'mac_address': clean_column(df, 'Primary MAC Address'),
+        'owner': clean_column(df, 'Primary Owner'),
+        'os_type': clean_column(df, 'OS Type'),
+        'location': loc,
+    })
+    cleaned = cleaned[cleaned['name'] != ''] # Skip effectively empty rows
+    return list(cleaned.itertuples(index=False, name=None))
+
 def import_data():
     print("Starting import for Enterprise Computing Machines...")
     csv_path = r"C:\Users\Anand\Downloads\KPU_MasterAsset_List - SafeListDevices.csv"
     try:
-        df = pd.read_csv(csv_path)
+        # Streamed in CHUNK_ROWS pieces; every column read as text (no type inference)
+        chunks = pd.read_csv(csv_path, dtype=str, chunksize=CHUNK_ROWS)
     except Exception as e:
         print(f"Error reading CSV: {e}")
         return
@@ -23,11 +47,10 @@ def import_data():
     # OS Type -> os_type
     # last_location OR Location -> location (prioritize last_location)
     
-    count = 0
-    
     # Use cloud connection if available, else local
     conn = db._get_cloud_conn()
-    if not conn:
+    is_cloud = conn is not None # Decided by the connection we got, not db.mode
+    if not is_cloud:
         print("Using LOCAL connection")
         conn = db._get_local_conn()
     else:
@@ -35,61 +58,46 @@ def import_data():
 
     cursor = conn.cursor()
 
-    for index, row in df.iterrows():
-        # Clean data
-        asset_id = str(row.get('Asset_ID', '')).strip()
-        if asset_id in ['nan', 'None']: asset_id = ''
-        
-        name = str(row.get('Asset_Name', '')).strip()
-        if name in ['nan', 'None']: name = ''
-        
-        # If no name, try to use Host Name or similar if available, or skip
-        if not name: 
-            host = str(row.get('EndPoint Name', '')).strip()
-            if host and host != 'nan':
-                name = host
-            else:
-                continue # Skip effectively empty rows
-        
-        ip_addr = str(row.get('Primary IP Address', '')).strip()
-        if ip_addr == 'nan': ip_addr = ''
-        
-        mac_addr = str(row.get('Primary MAC Address', '')).strip()
-        if mac_addr == 'nan': mac_addr = ''
-        
-        owner = str(row.get('Primary Owner', '')).strip()
-        if owner == 'nan': owner = ''
-        
-        os_type = str(row.get('OS Type', '')).strip()
-        if os_type == 'nan': os_type = ''
-        
-        # Location logic
-        loc = str(row.get('last_location', '')).strip()
-        if loc in ['nan', 'None', '']: 
-            loc = str(row.get('Location', '')).strip()
-        if loc == 'nan': loc = ''
-        
-        # SQL
-        if db.mode == "CLOUD":
-            query = """
-            INSERT INTO kpu_enterprise_computing_machines 
-            (asset_id, name, ip_address, mac_address, owner, os_type, location)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(query, (asset_id, name, ip_addr, mac_addr, owner, os_type, loc))
-        else:
-             # Local SQLite
-            query = """
-            INSERT INTO kpu_enterprise_computing_machines 
-            (asset_id, name, ip_address, mac_address, owner, os_type, location)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """
-            cursor.execute(query, (asset_id, name, ip_addr, mac_addr, owner, os_type, loc))
-            
-        count += 1
-        
-    conn.commit()
-    conn.close()
+    # Trusted one-shot load: skip per-row FK/unique validation for this session
+    if is_cloud:
+        cursor.execute("SET foreign_key_checks=0")
+        cursor.execute("SET unique_checks=0")
+    else:
+        # Connection-scoped; both revert when the connection closes
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+
+    # One canonical (MySQL) INSERT template, rewritten for SQLite when local,
+    # sent in executemany batches of BATCH_SIZE rows
+    query = """
+        INSERT INTO kpu_enterprise_computing_machines 
+        (asset_id, name, ip_address, mac_address, owner, os_type, location)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+    if not is_cloud:
+        query = _mysql_to_sqlite(query)
+
+    # Clean + insert chunk by chunk, so memory stays flat for any file size
+    count = 0
+    try:
+        with closing(cleaned_chunks(chunks, clean_rows)) as batches:
+            for rows in batches:
+                for start in range(0, len(rows), BATCH_SIZE):
+                    cursor.executemany(query, rows[start:start + BATCH_SIZE])
+                count += len(rows)
+        conn.commit() # Single commit for the whole import
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Import failed, rolled back: {e}")
+        return
+    finally:
+        try:
+            if is_cloud:
+                # Restore checks before the connection goes back to the pool
+                cursor.execute("SET unique_checks=1")
+                cursor.execute("SET foreign_key_checks=1")
+        finally:
+            conn.close()
             
     print(f"✅ Imported {count} machines into kpu_enterprise_computing_machines.")
 
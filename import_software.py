@@ -1,13 +1,27 @@
 
+from contextlib import closing
 import pandas as pd
-from database_manager import DatabaseManager
+from database_manager import DatabaseManager, _mysql_to_sqlite
+from utils.csv_import import BATCH_SIZE, CHUNK_ROWS, clean_column, cleaned_chunks
 import streamlit as st
 
+def clean_rows(df):
+    """Cleans one chunk (vectorized over whole columns) into insert-ready tuples."""
+    cleaned = pd.DataFrame({
+        'asset_id': clean_column(df, 'Asset_ID'),
+        'name': clean_column(df, 'Name'),
+        'manufacturer': clean_column(df, 'Manufacturer'),
+        'mfa_enabled': clean_column(df, 'MFA Enabled'),
+    })
+    cleaned = cleaned[cleaned['name'] != ''] # Skip empty rows
+    return list(cleaned.itertuples(index=False, name=None))
+
 def import_data():
     print("Starting import...")
     csv_path = r"C:\Users\Anand\Downloads\KPU_MasterAsset_List - Layer7List.csv"
     try:
-        df = pd.read_csv(csv_path)
+        # Streamed in CHUNK_ROWS pieces; every column read as text (no type inference)
+        chunks = pd.read_csv(csv_path, dtype=str, chunksize=CHUNK_ROWS)
     except Exception as e:
         print(f"Error reading CSV: {e}")
         return
@@ -15,11 +29,10 @@ def import_data():
     db = DatabaseManager()
     
     # Expected columns: Asset_ID,Name,Manufacturer,MFA Enabled
-    count = 0
-    
     # Use cloud connection if available, else local
     conn = db._get_cloud_conn()
-    if not conn:
+    is_cloud = conn is not None # Decided by the connection we got, not db.mode
+    if not is_cloud:
         print("Using LOCAL connection")
         conn = db._get_local_conn()
     else:
@@ -27,40 +40,45 @@ def import_data():
 
     cursor = conn.cursor()
 
-    for index, row in df.iterrows():
-        # Clean data
-        asset_id = str(row.get('Asset_ID', '')).strip()
-        if asset_id == 'nan': asset_id = ''
-        
-        name = str(row.get('Name', '')).strip()
-        
-        manufacturer = str(row.get('Manufacturer', '')).strip()
-        if manufacturer == 'nan': manufacturer = ''
-        
-        mfa = str(row.get('MFA Enabled', '')).strip()
-        if mfa == 'nan': mfa = ''
+    # Trusted one-shot load: skip per-row FK/unique validation for this session
+    if is_cloud:
+        cursor.execute("SET foreign_key_checks=0")
+        cursor.execute("SET unique_checks=0")
+    else:
+        # Connection-scoped; both revert when the connection closes
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
 
-        if not name: continue # Skip empty rows
+    # One canonical (MySQL) INSERT template, rewritten for SQLite when local,
+    # sent in executemany batches of BATCH_SIZE rows
+    query = """
+        INSERT INTO kpu_enterprise_software (asset_id, name, manufacturer, mfa_enabled)
+        VALUES (%s, %s, %s, %s)
+        """
+    if not is_cloud:
+        query = _mysql_to_sqlite(query)
 
-        # SQL
-        if db.mode == "CLOUD":
-            query = """
-            INSERT INTO kpu_enterprise_software (asset_id, name, manufacturer, mfa_enabled)
-            VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (asset_id, name, manufacturer, mfa))
-        else:
-             # Local SQLite
-            query = """
-            INSERT INTO kpu_enterprise_software (asset_id, name, manufacturer, mfa_enabled)
-            VALUES (?, ?, ?, ?)
-            """
-            cursor.execute(query, (asset_id, name, manufacturer, mfa))
-            
-        count += 1
-        
-    conn.commit()
-    conn.close()
+    # Clean + insert chunk by chunk, so memory stays flat for any file size
+    count = 0
+    try:
+        with closing(cleaned_chunks(chunks, clean_rows)) as batches:
+            for rows in batches:
+                for start in range(0, len(rows), BATCH_SIZE):
+                    cursor.executemany(query, rows[start:start + BATCH_SIZE])
+                count += len(rows)
+        conn.commit() # Single commit for the whole import
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Import failed, rolled back: {e}")
+        return
+    finally:
+        try:
+            if is_cloud:
+                # Restore checks before the connection goes back to the pool
+                cursor.execute("SET unique_checks=1")
+                cursor.execute("SET foreign_key_checks=1")
+        finally:
+            conn.close()
             
     print(f"✅ Imported {count} records into kpu_enterprise_software.")
 
@@ -32,14 +32,22 @@ if st.session_state.get('success_ticket_id'):
         st.rerun()
 
 # --- Fetch Assets for Multi-Select ---
-assets_machines = db.execute("SELECT id, name FROM kpu_enterprise_computing_machines", fetch=True)
-assets_software = db.execute("SELECT id, name FROM kpu_enterprise_software", fetch=True)
+# Cached for 5 minutes so widget interactions don't re-query the catalog
+assets = db.get_ticket_assets()
 
-# Process for SelectBox options
-machine_options = {f"💻 {m['name']} (ID: {m['id']})": {'id': m['id'], 'type': 'computing_machine'} for m in assets_machines} if assets_machines else {}
-software_options = {f"💾 {s['name']} (ID: {s['id']})": {'id': s['id'], 'type': 'software'} for s in assets_software} if assets_software else {}
+# Process for SelectBox options: flat (kind, id) -> name map; labels are
+# only formatted by the multiselect itself
+asset_names = {(a['kind'], a['id']): a['name'] for a in assets}
+ASSET_ICONS = {'computing_machine': '💻', 'software': '💾'}
 
-all_options = {**machine_options, **software_options}
+def asset_label(key):
+    kind, aid = key
+    return f"{ASSET_ICONS.get(kind, '📦')} {asset_names[key]} (ID: {aid})"
+
+# Pick up machines/software added since the list was cached (e.g. after an import)
+if st.button("🔄 Refresh Asset List"):
+    db.clear_ticket_assets_cache()
+    st.rerun()
 
 # --- Form ---
 
@@ -51,7 +59,7 @@ with st.form("create_ticket_form"):
         desc = st.text_area("Description", placeholder="Detailed explanation of the issue...", height=150)
         
         st.markdown("### Related Assets")
-        selected_labels = st.multiselect("Select Affected Assets", options=all_options.keys(), placeholder="Search for machines or software...")
+        selected_assets = st.multiselect("Select Affected Assets", options=list(asset_names), format_func=asset_label, placeholder="Search for machines or software...")
         
     with c2:
         priority = st.selectbox("Priority", ["Low", "Medium", "High", "Critical"])
@@ -73,7 +81,7 @@ with st.form("create_ticket_form"):
             st.error("Title is required.")
         else:
             # Prepare Asset List
-            asset_list = [all_options[label] for label in selected_labels]
+            asset_list = [{'id': aid, 'type': kind} for kind, aid in selected_assets]
             
             with st.spinner("Creating Ticket..."):
                 success, res = db.create_ticket_with_assets(
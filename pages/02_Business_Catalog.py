@@ -4,7 +4,6 @@ import importlib
 import database_manager
 importlib.reload(database_manager)
 from database_manager import DatabaseManager
-import time
 import getpass
 
 # =============================================================================
@@ -20,6 +19,11 @@ import getpass
 
 st.set_page_config(page_title="2D Mandrake - Service Management & Compliance", page_icon="🌳", layout="wide")
 
+# One-shot notice queued by an action before its rerun (no blocking sleep)
+sc_flash = st.session_state.pop('sc_flash', None)
+if sc_flash:
+    st.toast(sc_flash)
+
 st.title("🌳 2D Mandrake - Service Management & Compliance")
 st.info("""
 **Strategic Asset & Service Orchestration**
@@ -203,14 +207,13 @@ if st.session_state.sc_ticket_target:
             if new_id:
                 if t_file:
                     if db.save_attachment(new_id, t_file):
-                        st.success("Ticket & Attachment Created!")
+                        st.session_state.sc_flash = "Ticket & Attachment Created!"
                     else:
-                        st.warning("Ticket created, but attachment upload failed.")
+                        st.session_state.sc_flash = "⚠️ Ticket created, but attachment upload failed."
                 else:
-                    st.success("Ticket Created!")
+                    st.session_state.sc_flash = "Ticket Created!"
                 
                 st.session_state.sc_ticket_target = None
-                time.sleep(1)
                 st.rerun()
             else:
                 st.error("Failed to create ticket.")
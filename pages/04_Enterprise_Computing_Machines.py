@@ -2,7 +2,6 @@
 import streamlit as st
 import pandas as pd
 from database_manager import DatabaseManager
-import time
 import getpass
 
 st.set_page_config(layout="wide", page_title="Enterprise Computing Machines", page_icon="🖥️")
@@ -25,6 +24,11 @@ if 'db_manager' not in st.session_state or \
 db = st.session_state.db_manager
 db.render_sidebar_status()
 
+# One-shot notice queued by an action before its rerun (no blocking sleep)
+ecm_flash = st.session_state.pop('ecm_flash', None)
+if ecm_flash:
+    st.toast(ecm_flash, icon="🗑️")
+
 # Success Confirmation
 if st.session_state.get('success_ticket_id'):
     st.success(f"✅ Ticket #{st.session_state.success_ticket_id} Created Successfully!")
@@ -45,53 +49,87 @@ if 'ecm_ticket_target' not in st.session_state:
 if 'ecm_comp_target' not in st.session_state:
     st.session_state.ecm_comp_target = None
 
+# Page scripts re-execute on every rerun, so "module scope" isn't enough:
+# look the OS user up once per session
+if 'current_user' not in st.session_state:
+    st.session_state.current_user = getpass.getuser()
+
 # --- HELPERS ---
-def fetch_machines():
-    return db.execute("SELECT * FROM kpu_enterprise_computing_machines ORDER BY name", fetch=True) or []
+PAGE_SIZE = 50 # Machines per page of the list
+
+# The machine list is cached across reruns (keyed by db.mode); every write
+# below drops it, along with the Create Ticket asset catalog.
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_machines(_db, mode, offset, limit):
+    # Only the columns the list, edit form and actions use. Explicit on purpose:
+    # a column the UI starts showing must be added here too.
+    sql = "SELECT id, asset_id, name, ip_address, mac_address, owner, os_type, location FROM kpu_enterprise_computing_machines ORDER BY name LIMIT %s OFFSET %s"
+    return _db.execute(sql, (limit, offset), fetch=True) or []
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_machine_count(_db, mode):
+    res = _db.execute("SELECT COUNT(*) AS n FROM kpu_enterprise_computing_machines", fetch=True)
+    return res[0]['n'] if res else 0
+
+def fetch_machines(offset=0, limit=PAGE_SIZE):
+    return _cached_machines(db, db.mode, offset, limit)
+
+def count_machines():
+    return _cached_machine_count(db, db.mode)
+
+def invalidate_machines(result):
+    if result:
+        _cached_machines.clear()
+        _cached_machine_count.clear()
+        db.clear_ticket_assets_cache()
+        # New table widget key: drops the row selection, whose index would
+        # otherwise point at a different machine once the list has changed
+        st.session_state.ecm_table_gen = st.session_state.get('ecm_table_gen', 0) + 1
+    return result
+
+# Canonical MySQL statements, built once; db.execute() rewrites them for SQLite
+# in LOCAL mode (memoized per SQL text), so no per-call dialect branch is needed.
+# SELECTs name their columns (no *): extend them when the UI shows more fields.
+SQL_INSERT_MACHINE = "INSERT INTO kpu_enterprise_computing_machines (asset_id, name, ip_address, mac_address, owner, os_type, location) VALUES (%s, %s, %s, %s, %s, %s, %s)"
+SQL_UPDATE_MACHINE = "UPDATE kpu_enterprise_computing_machines SET asset_id=%s, name=%s, ip_address=%s, mac_address=%s, owner=%s, os_type=%s, location=%s WHERE id=%s"
+SQL_DELETE_MACHINE = "DELETE FROM kpu_enterprise_computing_machines WHERE id=%s"
+SQL_LINKED_CONTROLS = "SELECT ic.id, ic.description, ac.status FROM iso_controls ic JOIN asset_controls ac ON ic.id = ac.control_id WHERE ac.asset_id=%s AND ac.related_type='computing_machine'"
+SQL_LINK_CONTROL = (
+    "INSERT INTO asset_controls (asset_id, related_type, control_id, status, notes) VALUES (%s, 'computing_machine', %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE status=VALUES(status), notes=VALUES(notes)"
+)
 
 def add_machine(asset_id, name, ip, mac, owner, os, loc):
-    if db.mode == "CLOUD":
-        sql = "INSERT INTO kpu_enterprise_computing_machines (asset_id, name, ip_address, mac_address, owner, os_type, location) VALUES (%s, %s, %s, %s, %s, %s, %s)"
-        return db.execute(sql, (asset_id, name, ip, mac, owner, os, loc))
-    else:
-        sql = "INSERT INTO kpu_enterprise_computing_machines (asset_id, name, ip_address, mac_address, owner, os_type, location) VALUES (?, ?, ?, ?, ?, ?, ?)"
-        return db.execute(sql, (asset_id, name, ip, mac, owner, os, loc))
+    return invalidate_machines(db.execute(SQL_INSERT_MACHINE, (asset_id, name, ip, mac, owner, os, loc)))
 
 def update_machine(mid, asset_id, name, ip, mac, owner, os, loc):
-    if db.mode == "CLOUD":
-        sql = "UPDATE kpu_enterprise_computing_machines SET asset_id=%s, name=%s, ip_address=%s, mac_address=%s, owner=%s, os_type=%s, location=%s WHERE id=%s"
-        return db.execute(sql, (asset_id, name, ip, mac, owner, os, loc, mid))
-    else:
-        sql = "UPDATE kpu_enterprise_computing_machines SET asset_id=?, name=?, ip_address=?, mac_address=?, owner=?, os_type=?, location=? WHERE id=?"
-        return db.execute(sql, (asset_id, name, ip, mac, owner, os, loc, mid))
+    return invalidate_machines(db.execute(SQL_UPDATE_MACHINE, (asset_id, name, ip, mac, owner, os, loc, mid)))
 
 def delete_machine(mid):
-    return db.execute("DELETE FROM kpu_enterprise_computing_machines WHERE id=%s", (mid,))
+    return invalidate_machines(db.execute(SQL_DELETE_MACHINE, (mid,)))
 
-def create_machine_ticket(mid, t_type, title, desc, prio, status, user):
-    return db.create_ticket(mid, t_type, title, desc, prio, user, related_type='computing_machine', status=status)
+def create_machine_ticket(mid, t_type, title, desc, prio, status, user, attachment=None):
+    # Ticket and attachment record are committed together
+    return db.create_ticket(mid, t_type, title, desc, prio, user, related_type='computing_machine', status=status, attachment=attachment)
 
 # --- COMPLIANCE HELPERS ---
 def fetch_linked_controls(item_id):
-    sql = "SELECT ic.*, ac.status FROM iso_controls ic JOIN asset_controls ac ON ic.id = ac.control_id WHERE ac.asset_id=%s AND ac.related_type='computing_machine'"
-    if db.mode != "CLOUD": sql = sql.replace("%s", "?")
-    return db.execute(sql, (item_id,), fetch=True) or []
+    return db.execute(SQL_LINKED_CONTROLS, (item_id,), fetch=True) or []
 
 def link_control(item_id, cid, stat, note):
-    if db.mode == "CLOUD":
-        sql = "INSERT INTO asset_controls (asset_id, related_type, control_id, status, notes) VALUES (%s, 'computing_machine', %s, %s, %s)"
-        check = db.execute("SELECT id FROM asset_controls WHERE asset_id=%s AND related_type='computing_machine' AND control_id=%s", (item_id, cid), fetch=True)
-        if check:
-            sql_up = "UPDATE asset_controls SET status=%s, notes=%s WHERE id=%s"
-            return db.execute(sql_up, (stat, note, check[0]['id']))
-        else:
-            return db.execute(sql, (item_id, cid, stat, note))
-    else:
-        sql = "INSERT OR REPLACE INTO asset_controls (asset_id, related_type, control_id, status, notes) VALUES (?, 'computing_machine', ?, ?, ?)"
-        return db.execute(sql, (item_id, cid, stat, note))
+    # Upsert on the (asset_id, control_id) unique key; db.execute rewrites it
+    # to INSERT OR REPLACE for SQLite
+    return db.execute(SQL_LINK_CONTROL, (item_id, cid, stat, note))
 
-def fetch_all_iso():
-    return db.execute("SELECT * FROM iso_controls ORDER BY id", fetch=True) or []
+# ISO catalog is seeded reference data: cached with its selectbox labels
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_iso_catalog(_db, mode):
+    rows = _db.execute("SELECT id, description FROM iso_controls ORDER BY id", fetch=True) or []
+    return rows, [f"{c['id']} - {c['description'][:50]}" for c in rows]
+
+def fetch_iso_catalog():
+    """Returns (controls, option labels)."""
+    return _cached_iso_catalog(db, db.mode)
 
 # --- SIDEBAR TOGGLES ---
 col_head, col_tog = st.columns([0.8, 0.2])
@@ -155,15 +193,13 @@ if st.session_state.ecm_ticket_target:
         
         c3, c4 = st.columns(2)
         t_status = c3.selectbox("Status", ["Open", "In Progress", "Resolved", "Closed"])
-        t_user = c4.text_input("Logged By", value=getpass.getuser())
+        t_user = c4.text_input("Logged By", value=st.session_state.current_user)
         
         t_file = st.file_uploader("Attach Document/Image", type=["png", "jpg", "jpeg", "pdf", "docx", "txt"])
         
         if st.form_submit_button("Create Ticket"):
-            new_id = create_machine_ticket(tgt['id'], t_type, t_title, t_desc, t_prio, t_status, t_user)
+            new_id = create_machine_ticket(tgt['id'], t_type, t_title, t_desc, t_prio, t_status, t_user, attachment=t_file)
             if new_id:
-                if t_file:
-                    db.save_attachment(new_id, t_file)
                 st.session_state.success_ticket_id = new_id
                 st.session_state.ecm_ticket_target = None
                 st.rerun()
@@ -187,14 +223,13 @@ if st.session_state.ecm_comp_target:
         st.caption("ISO 27001 Controls")
         linked = fetch_linked_controls(tgt['id'])
         if linked:
-            for l in linked:
-                st.markdown(f"- **{l['id']}**: {l['description']} ({l['status']})")
+            # One markdown element for the whole list
+            st.markdown("\n".join(f"- **{l['id']}**: {l['description']} ({l['status']})" for l in linked))
         else:
             st.info("No controls linked.")
             
         st.divider()
-        all_c = fetch_all_iso()
-        opts = [f"{c['id']} - {c['description'][:50]}" for c in all_c]
+        all_c, opts = fetch_iso_catalog()
         sel_idx = st.selectbox("Link Control", range(len(opts)), format_func=lambda x: opts[x])
         s_stat = st.selectbox("Status", ["Applicable", "Compliant", "Non-Compliant"])
         s_note = st.text_input("Notes")
@@ -208,53 +243,66 @@ if st.session_state.ecm_comp_target:
     st.divider()
 
 # --- DISPLAY LIST ---
-rows = fetch_machines()
+total = count_machines()
+page_count = max(1, -(-total // PAGE_SIZE)) # Ceiling division
+if page_count > 1:
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1, key="ecm_page")
+    st.caption(f"{total} machines, {PAGE_SIZE} per page.")
+else:
+    page = 1
+rows = fetch_machines((page - 1) * PAGE_SIZE, PAGE_SIZE)
 
 if not rows:
     st.info("No computing machines found.")
 else:
-    # Header
-    h0, h1, h2, h3, h4, h5, h6 = st.columns([0.5, 2, 1.5, 1.5, 1.5, 1.5, 2])
-    h0.markdown("**#**")
-    h1.markdown("**Name**")
-    h2.markdown("**IP Address**")
-    h3.markdown("**Owner**")
-    h4.markdown("**OS**")
-    h5.markdown("**Location**")
-    h6.markdown("**Actions**")
-    st.markdown("---")
+    # One dataframe for the whole list (instead of a widget row per machine);
+    # actions apply to the selected row
+    event = st.dataframe(
+        pd.DataFrame(rows)[['name', 'ip_address', 'owner', 'os_type', 'location']],
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        # Selection is by row index, so it is scoped to this page and list version
+        key=f"ecm_table_{page}_{st.session_state.get('ecm_table_gen', 0)}",
+        column_config={
+            "name": st.column_config.TextColumn("Name"),
+            "ip_address": st.column_config.TextColumn("IP Address"),
+            "owner": st.column_config.TextColumn("Owner"),
+            "os_type": st.column_config.TextColumn("OS"),
+            "location": st.column_config.TextColumn("Location"),
+        }
+    )
     
-    for idx, r in enumerate(rows, 1):
-        c0, c1, c2, c3, c4, c5, c6 = st.columns([0.5, 2, 1.5, 1.5, 1.5, 1.5, 2])
-        c0.write(f"{idx}")
-        c1.write(r['name'])
-        c2.code(r['ip_address'])
-        c3.write(r['owner'])
-        c4.write(r['os_type'])
-        c5.write(r['location'])
-        
-        with c6:
-            if manage_mode:
-                b1, b2, b3 = st.columns(3)
-                if b1.button("✏️", key=f"ed_m_{r['id']}", help="Edit"):
-                    st.session_state.ecm_edit_target = r
-                    st.rerun()
-                if b2.button("🗑️", key=f"del_m_{r['id']}", help="Delete"):
-                    delete_machine(r['id'])
-                    st.success("Deleted")
-                    time.sleep(0.5)
-                    st.rerun()
-                if b3.button("🛡️", key=f"comp_m_{r['id']}", help="Compliance"):
-                    st.session_state.ecm_comp_target = r
-                    st.rerun()
-            else:
-                if st.button("🎫 Ticket", key=f"tik_m_{r['id']}"):
-                    st.session_state.ecm_ticket_target = r
-                    st.rerun()
-        st.markdown("---")
+    selected = event.selection.rows
+    if not selected or selected[0] >= len(rows):
+        st.caption("Select a machine to see its actions.")
+    else:
+        r = rows[selected[0]]
+        st.markdown(f"**Selected:** {r['name']} (`{r['ip_address']}`)")
+        if manage_mode:
+            b1, b2, b3, _ = st.columns([1, 1, 1, 5])
+            if b1.button("✏️ Edit", key="ed_m"):
+                st.session_state.ecm_edit_target = r
+                st.rerun()
+            if b2.button("🗑️ Delete", key="del_m"):
+                delete_machine(r['id'])
+                st.session_state.ecm_flash = f"Deleted {r['name']}"
+                st.rerun()
+            if b3.button("🛡️ Compliance", key="comp_m"):
+                st.session_state.ecm_comp_target = r
+                st.rerun()
+        else:
+            if st.button("🎫 Ticket", key="tik_m"):
+                st.session_state.ecm_ticket_target = r
+                st.rerun()
 
     with st.expander("🔍 Source Data"):
-        if rows:
-            st.dataframe(pd.DataFrame(rows), use_container_width=True)
-        else:
-            st.write("No source data available.")
+        # Full-table scan only on request
+        if st.checkbox("Load full table", key="ecm_load_full"):
+            # Deliberately every column: this is the raw-table view
+            rows_full = db.execute("SELECT * FROM kpu_enterprise_computing_machines ORDER BY name", fetch=True)
+            if rows_full:
+                st.dataframe(pd.DataFrame(rows_full), use_container_width=True)
+            else:
+                st.write("No source data available.")
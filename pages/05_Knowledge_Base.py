@@ -1,6 +1,5 @@
 import streamlit as st
 from database_manager import DatabaseManager
-import time
 
 # =============================================================================
 # Page: Knowledge Base
@@ -14,6 +13,11 @@ import time
 
 st.set_page_config(page_title="Knowledge Base", page_icon="📚", layout="wide")
 
+# One-shot notice queued by an action before its rerun (no blocking sleep)
+kb_flash = st.session_state.pop('kb_flash', None)
+if kb_flash:
+    st.toast(kb_flash)
+
 st.title("📚 Knowledge Base")
 st.info("""
 **Self-Service & Institutional Wisdom**
@@ -58,8 +62,7 @@ with st.expander("➕ Create New Article"):
                         """
                         db.execute(sql, (new_title, new_category, new_content, new_tags))
                     
-                    st.success("✅ Article Published!")
-                    time.sleep(1)
+                    st.session_state.kb_flash = "✅ Article Published!"
                     st.rerun()
                 except Exception as e:
                     st.error(f"Error publishing article: {e}")
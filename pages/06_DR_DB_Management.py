@@ -3,10 +3,14 @@ import streamlit as st
 import pandas as pd
 import database_manager
 import importlib
-import time
-
-# Force reload module
-importlib.reload(database_manager)
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+
+# Module reload is debug-only (Debug Info -> Reload Module); it also drops the
+# session's manager so it is rebuilt from the reloaded class
+if st.session_state.pop("dr_force_reload", False):
+    importlib.reload(database_manager)
+    st.session_state.pop("db_manager", None)
 from database_manager import DatabaseManager
 
 st.set_page_config(page_title="DR DB Management", page_icon="🗄️", layout="wide")
@@ -14,6 +18,11 @@ st.set_page_config(page_title="DR DB Management", page_icon="🗄️", layout="w
 st.title("🗄️ DR DB Management")
 st.info("View and synchronize tables across Primary and Secondary database instances. This tool helps ensure schema integrity and data propagation.")
 
+# Result of the last action, queued before its rerun (no blocking sleep)
+dr_flash = st.session_state.pop("dr_flash", None)
+if dr_flash:
+    st.success(dr_flash)
+
 SYSTEM_TABLES = [
     "assets", "tickets", "ticket_assets", "ticket_attachments", "problems",
     "iso_controls", "asset_controls",
@@ -24,6 +33,28 @@ SYSTEM_TABLES = [
     "kpu_enterprise_assets", "kpu_component_assets",
     "kpu_enterprise_software", "kpu_enterprise_computing_machines"
 ]
+SYSTEM_TABLES_SET = frozenset(SYSTEM_TABLES)
+
+def render_table_list(tables):
+    """Table list with Core tables first, plus a found/core count."""
+    # Single membership pass: partition, then each side sorts by name
+    core, other = [], []
+    for t in tables:
+        (core if t in SYSTEM_TABLES_SET else other).append(t)
+    core.sort()
+    other.sort()
+    
+    df = pd.DataFrame({
+        "Table Name": core + other,
+        "Type": ["⭐ Core"] * len(core) + [""] * len(other),
+    })
+    st.dataframe(df, use_container_width=True, hide_index=True)
+    st.success(f"Found {len(tables)} tables ({len(core)} Core).")
+
+def sync_progress(label):
+    """Returns an on_progress(done, total) callback driving a progress bar."""
+    bar = st.progress(0.0, text=label)
+    return lambda done, total: bar.progress(done / total, text=f"{label} ({done}/{total} tables)")
 
 with st.expander("🔍 Debug Info (Connection)", expanded=False):
     st.write("Checking Secret Visibility:")
@@ -49,14 +80,16 @@ with st.expander("🔍 Debug Info (Connection)", expanded=False):
                 
     if st.button("🔄 Hard Reset Connection Manager", type="primary"):
         if 'db_manager' in st.session_state:
-            # Try to stop tunnel if exists
+            # Try to stop tunnel (and its pools) if exists
             try:
-                if st.session_state.db_manager.ssh_tunnel:
-                    st.session_state.db_manager.ssh_tunnel.stop()
+                st.session_state.db_manager.stop_tunnel()
             except: pass
             del st.session_state.db_manager
-        st.success("Manager Reset. reloading...")
-        time.sleep(1)
+        st.session_state.dr_flash = "Manager Reset."
+        st.rerun()
+
+    if st.button("♻️ Reload Module", help="Re-import database_manager.py (picks up code changes without restarting)."):
+        st.session_state.dr_force_reload = True
         st.rerun()
         
     st.markdown("---")
@@ -70,30 +103,50 @@ with st.expander("🔍 Debug Info (Connection)", expanded=False):
             # Creating a quick helper here using db_mgr internal concepts for debug
             
             cfg = st.secrets["mysql"] if sql_tgt == "PRIMARY" else st.secrets["mysql_backup"]
-            conn = db_mgr._connect_to_source(cfg)
-            cur = conn.cursor()
-            cur.execute(raw_sql)
-            res = cur.fetchall()
-            cols = [desc[0] for desc in cur.description]
+            # Pooled connection (reuses the SSH tunnel); closing() hands it back
+            # to the pool even when the query fails
+            with closing(db_mgr._connect_to_source(cfg)) as conn:
+                cur = conn.cursor()
+                cur.execute(raw_sql)
+                res = cur.fetchall()
+                cols = [desc[0] for desc in cur.description]
             st.dataframe(pd.DataFrame(res, columns=cols))
-            conn.close()
         except Exception as e:
             st.error(f"SQL Error: {e}")
 
-# Initialize DB Manager if not present OR if stale
-if 'db_manager' in st.session_state:
-    if not hasattr(st.session_state.db_manager, '_connect_to_source'):
-        del st.session_state.db_manager
-
+# Initialize DB Manager if not present
 if 'db_manager' not in st.session_state:
     st.session_state.db_manager = DatabaseManager()
 
 db = st.session_state.db_manager
 
-col1, col2 = st.columns(2)
+def fetch_tables(source):
+    """Returns (tables, error) so a failed source doesn't abort the other."""
+    try:
+        return db.get_tables(source) or [], None
+    except Exception as e:
+        return [], e
+
+# Secondary is only fetched on request (one fewer round trip / tunnel on first paint)
+show_secondary = st.toggle("🛡️ Load Secondary Database", key="dr_show_secondary", help="Fetch the Backup table list for comparison, sync and restore.")
+
+secondary_tables, secondary_err = [], None
+if show_secondary:
+    # Both lists are independent network round trips: fetch them concurrently
+    with st.spinner("Fetching Primary & Secondary Tables..."):
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            (primary_tables, primary_err), (secondary_tables, secondary_err) = ex.map(fetch_tables, ["PRIMARY", "SECONDARY"])
+else:
+    with st.spinner("Fetching Primary Tables..."):
+        primary_tables, primary_err = fetch_tables("PRIMARY")
+
+# Built once per run; reused by the comparison, sync defaults and usage table
+set_p = frozenset(primary_tables)
+set_s = frozenset(secondary_tables)
+only_p = sorted(set_p - set_s) # Missing in Secondary
+only_s = sorted(set_s - set_p) # Missing in Primary
 
-primary_tables = []
-secondary_tables = []
+col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("### ☁️ Primary Database")
@@ -111,6 +164,7 @@ with col1:
         st.caption("Active Production Source")
 
     if st.button("Refresh Primary", key="ref_pri", help="Reload the table list from the Live Primary Database."):
+        db.clear_tables_cache()
         st.rerun()
         
     with st.expander("🛠️ Advanced: Schema Repair"):
@@ -119,48 +173,18 @@ with col1:
             with st.spinner("Creating Missing Tables on Primary..."):
                 ret_s, ret_msg = db.ensure_cloud_schema("PRIMARY")
                 if ret_s:
-                    st.success(ret_msg)
-                    time.sleep(2)
+                    st.session_state.dr_flash = f"Primary: {ret_msg}"
                     st.rerun()
                 else:
                     st.error(ret_msg)
         
-    with st.spinner("Fetching Primary Tables..."):
-        try:
-            primary_tables = db.get_tables("PRIMARY")
-            if primary_tables:
-                # Add highlighting logic
-                sys_set = set(["assets", "tickets", "ticket_assets", "ticket_attachments", "problems",
-                    "iso_controls", "asset_controls",
-                    "nist_controls", "asset_nist_controls", "policy_nist_mappings",
-                    "policies", "sla_policies",
-                    "kpu_business_services_level1", "kpu_business_services_level2",
-                    "kpu_technical_services",
-                    "kpu_enterprise_assets", "kpu_component_assets",
-                    "kpu_enterprise_software", "kpu_enterprise_computing_machines"])
-
-                data_p = []
-                for t in primary_tables:
-                    is_sys = "⭐ Core" if t in sys_set else ""
-                    # Hidden sort key: (0 if core else 1, Name)
-                    data_p.append({"Table Name": t, "Type": is_sys, "_sort": (0 if is_sys else 1, t)})
-                
-                # Sort
-                data_p.sort(key=lambda x: x["_sort"])
-                
-                # Drop sort key for display
-                for d in data_p: del d["_sort"]
-                
-                df_p = pd.DataFrame(data_p)
-                st.dataframe(df_p, use_container_width=True, hide_index=True)
-                
-                core_count = len([t for t in primary_tables if t in sys_set])
-                st.success(f"Found {len(primary_tables)} tables ({core_count} Core).")
-            else:
-                st.warning("Database is empty (0 tables).")
-        except Exception as e:
-            st.error(f"Connection Failed: {e}")
-            st.caption("Common fixes: Check VPN, Firewall, or SSH Tunnel status.")
+    if primary_err:
+        st.error(f"Connection Failed: {primary_err}")
+        st.caption("Common fixes: Check VPN, Firewall, or SSH Tunnel status.")
+    elif primary_tables:
+        render_table_list(primary_tables)
+    else:
+        st.warning("Database is empty (0 tables).")
 
 with col2:
     st.markdown("### 🛡️ Secondary Database")
@@ -178,6 +202,7 @@ with col2:
         st.caption("Backup / Failover Target")
 
     if st.button("Refresh Secondary", key="ref_sec", help="Reload the table list from the Backup Secondary Database."):
+        db.clear_tables_cache()
         st.rerun()
 
     with st.expander("🛠️ Advanced: Schema Repair"):
@@ -186,72 +211,39 @@ with col2:
             with st.spinner("Creating Missing Tables on Secondary..."):
                 ret_s, ret_msg = db.ensure_cloud_schema("SECONDARY")
                 if ret_s:
-                    st.success(ret_msg)
-                    time.sleep(2)
+                    st.session_state.dr_flash = f"Secondary: {ret_msg}"
                     st.rerun()
                 else:
                     st.error(ret_msg)
         
-    with st.spinner("Fetching Secondary Tables..."):
-        try:
-            secondary_tables = db.get_tables("SECONDARY")
-            if secondary_tables:
-                # Add highlighting logic
-                sys_set = set(["assets", "tickets", "ticket_assets", "ticket_attachments", "problems",
-                    "iso_controls", "asset_controls",
-                    "nist_controls", "asset_nist_controls", "policy_nist_mappings",
-                    "policies", "sla_policies",
-                    "kpu_business_services_level1", "kpu_business_services_level2",
-                    "kpu_technical_services",
-                    "kpu_enterprise_assets", "kpu_component_assets",
-                    "kpu_enterprise_software", "kpu_enterprise_computing_machines"])
-
-                data_s = []
-                for t in secondary_tables:
-                     is_sys = "⭐ Core" if t in sys_set else ""
-                     data_s.append({"Table Name": t, "Type": is_sys, "_sort": (0 if is_sys else 1, t)})
-
-                # Sort
-                data_s.sort(key=lambda x: x["_sort"])
-                
-                # Drop sort key
-                for d in data_s: del d["_sort"]
-
-                df_s = pd.DataFrame(data_s)
-                st.dataframe(df_s, use_container_width=True, hide_index=True)
-                
-                core_count_s = len([t for t in secondary_tables if t in sys_set])
-                st.success(f"Found {len(secondary_tables)} tables ({core_count_s} Core).")
-            else:
-                st.warning("Database is empty (0 tables).")
-        except Exception as e:
-             st.error(f"Connection Failed: {e}")
+    if not show_secondary:
+        st.info("Not loaded. Turn on **Load Secondary Database** above to fetch its tables.")
+    elif secondary_err:
+        st.error(f"Connection Failed: {secondary_err}")
+    elif secondary_tables:
+        render_table_list(secondary_tables)
+    else:
+        st.warning("Database is empty (0 tables).")
 
 st.divider()
 
 # Comparison Logic
-if primary_tables and secondary_tables:
-    set_p = set(primary_tables)
-    set_s = set(secondary_tables)
-    
-    missing_in_sec = list(set_p - set_s)
-    missing_in_pri = list(set_s - set_p)
-    
+if primary_tables and show_secondary and secondary_tables:
     st.subheader("📊 Schema Comparison")
     
     c_diff1, c_diff2 = st.columns(2)
     
     with c_diff1:
-        if missing_in_sec:
-            st.error(f"Missing in Secondary ({len(missing_in_sec)}):")
-            st.write(missing_in_sec)
+        if only_p:
+            st.error(f"Missing in Secondary ({len(only_p)}):")
+            st.write(only_p)
         else:
             st.success("✅ Secondary has all Primary tables.")
             
     with c_diff2:
-        if missing_in_pri:
-            st.warning(f"Missing in Primary ({len(missing_in_pri)}):")
-            st.write(missing_in_pri)
+        if only_s:
+            st.warning(f"Missing in Primary ({len(only_s)}):")
+            st.write(only_s)
         else:
             st.success("✅ Primary has all Secondary tables.")
 
@@ -266,17 +258,16 @@ st.subheader("🔄 Synchronization Tools")
 # Global Actions
 if st.button("🚀 Sync Core Tables Only", type="primary", help="Immediately sync all 19 system tables from Primary to Secondary"):
      # Filter SYSTEM_TABLES to those present in Primary
-     valid_core = [t for t in SYSTEM_TABLES if t in primary_tables]
+     valid_core = [t for t in SYSTEM_TABLES if t in set_p]
      if valid_core:
         with st.spinner("🚀 Syncing 3-Way (Primary->Secondary->Local)..."):
             # 1. Cloud
-            s_cloud, m_cloud = db.replicate_cloud_db("PRIMARY_TO_SECONDARY", tables=valid_core)
+            s_cloud, m_cloud = db.replicate_cloud_db("PRIMARY_TO_SECONDARY", tables=valid_core, on_progress=sync_progress("Primary -> Secondary"))
             # 2. Local
             if s_cloud:
                 s_loc, m_loc = db.sync()
                 final_msg = f"{m_cloud}\n\n✅ Local: {m_loc}" if s_loc else f"{m_cloud}\n\n⚠️ Local Failed: {m_loc}"
-                st.success(final_msg)
-                time.sleep(3)
+                st.session_state.dr_flash = final_msg
                 st.rerun()
             else:
                 st.error(m_cloud)
@@ -290,7 +281,7 @@ with sync_col1:
     st.caption("Push data from Production to Backup.")
     
     # Selective Sync
-    sel_tables_p = st.multiselect("Select Tables to Sync (P->S)", options=primary_tables, default=missing_in_sec if missing_in_sec else [])
+    sel_tables_p = st.multiselect("Select Tables to Sync (P->S)", options=primary_tables, default=only_p if show_secondary else [])
 
     # Stage 1: Review
     if st.button("🔎 Review Sync Plan (P->S)"):
@@ -312,7 +303,7 @@ with sync_col1:
             if st.button("✅ Confirm & Execute Sync", type="primary"):
                 with st.spinner(f"Syncing {len(st.session_state.sync_target_p)} tables... (Cloud & Local)"):
                     # 1. Cloud Replication (Primary -> Secondary)
-                    success_cloud, msg_cloud = db.replicate_cloud_db("PRIMARY_TO_SECONDARY", tables=st.session_state.sync_target_p)
+                    success_cloud, msg_cloud = db.replicate_cloud_db("PRIMARY_TO_SECONDARY", tables=st.session_state.sync_target_p, on_progress=sync_progress("Primary -> Secondary"))
                     
                     if success_cloud:
                         # 2. Local Sync (Cloud -> Local Cache)
@@ -320,9 +311,8 @@ with sync_col1:
                         
                         final_msg = f"{msg_cloud}\n\n✅ Local Cache Updated ({msg_local})" if success_local else f"{msg_cloud}\n\n⚠️ Local Sync Failed: {msg_local}"
                         
-                        st.success(final_msg)
+                        st.session_state.dr_flash = final_msg # Shown after the rerun
                         st.session_state.sync_stage_p = None # Reset
-                        time.sleep(3) # Give user time to read
                         st.rerun()
                     else:
                         st.error(msg_cloud)
@@ -336,7 +326,7 @@ with sync_col1:
         if st.checkbox("I understand this will ADD MISSING records to Secondary"):
             if st.button("🚨 Sync ALL Tables"):
                  with st.spinner("Syncing ALL tables... (This may take a while)"):
-                     success, msg = db.replicate_cloud_db("PRIMARY_TO_SECONDARY", tables=primary_tables)
+                     success, msg = db.replicate_cloud_db("PRIMARY_TO_SECONDARY", tables=primary_tables, on_progress=sync_progress("Primary -> Secondary"))
                      if success:
                         st.success(msg)
                      else:
@@ -367,11 +357,10 @@ with sync_col2:
         with c_conf_s1:
             if st.button("✅ Confirm & Execute Restore", type="primary"):
                 with st.spinner(f"Restoring {len(st.session_state.sync_target_s)} tables..."):
-                    success, msg = db.replicate_cloud_db("SECONDARY_TO_PRIMARY", tables=st.session_state.sync_target_s)
+                    success, msg = db.replicate_cloud_db("SECONDARY_TO_PRIMARY", tables=st.session_state.sync_target_s, on_progress=sync_progress("Secondary -> Primary"))
                     if success:
-                        st.success(msg)
+                        st.session_state.dr_flash = msg
                         st.session_state.sync_stage_s = None # Reset
-                        time.sleep(2)
                         st.rerun()
                     else:
                         st.error(msg)
@@ -386,22 +375,25 @@ st.divider()
 st.subheader("🏗️ System Table Usage")
 st.info("The following tables are actively used by the 2D Mandrake Application codebase.")
 
-# Create comparison dataframe for System Tables
-sys_data = []
-for t in SYSTEM_TABLES:
-    in_primary = "✅ Found" if t in primary_tables else "❌ Missing"
-    in_secondary = "✅ Found" if t in secondary_tables else "❌ Missing"
-    status_icon = "🟢" if t in primary_tables and t in secondary_tables else "🔴"
-    
-    sys_data.append({
-        "Status": status_icon,
-        "Table Name": t,
-        "Primary DB": in_primary,
-        "Secondary DB": in_secondary
-    })
+# Create comparison dataframe for System Tables (built column by column)
+in_p = [t in set_p for t in SYSTEM_TABLES]
+if show_secondary:
+    in_s = [t in set_s for t in SYSTEM_TABLES]
+    status = ["🟢" if p and s else "🔴" for p, s in zip(in_p, in_s)]
+    secondary_col = ["✅ Found" if s else "❌ Missing" for s in in_s]
+else:
+    status = ["⚪" if p else "🔴" for p in in_p]
+    secondary_col = ["➖ Not loaded"] * len(SYSTEM_TABLES)
+
+df_sys = pd.DataFrame({
+    "Status": status,
+    "Table Name": SYSTEM_TABLES,
+    "Primary DB": ["✅ Found" if p else "❌ Missing" for p in in_p],
+    "Secondary DB": secondary_col,
+})
 
 st.dataframe(
-    pd.DataFrame(sys_data), 
+    df_sys,
     use_container_width=True,
     hide_index=True,
     column_config={
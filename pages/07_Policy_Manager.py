@@ -2,14 +2,21 @@ import streamlit as st
 import pandas as pd
 import database_manager
 import importlib
-import time
+import os
 
-# Force reload to get new methods
-importlib.reload(database_manager)
+# Module reload is a development aid only (DEV_RELOAD=1); re-executing the
+# module on every rerun would also reset its caches and connection pools
+if os.environ.get("DEV_RELOAD"):
+    importlib.reload(database_manager)
 from database_manager import DatabaseManager
 
 st.set_page_config(page_title="Policy Manager", page_icon="📜", layout="wide")
 
+# One-shot notice queued by an action before its rerun (no blocking sleep)
+pm_flash = st.session_state.pop('pm_flash', None)
+if pm_flash:
+    st.toast(pm_flash)
+
 st.title("📜 Policy Manager")
 st.info("""
 **Governance, Risk, and Compliance (GRC)**
@@ -20,7 +27,7 @@ to demonstrate compliance coverage.
 # Initialize DB
 # Check for stale manager (missing new methods)
 if 'db_manager' in st.session_state:
-    if not hasattr(st.session_state.db_manager, 'get_nist_controls'):
+    if not hasattr(st.session_state.db_manager, 'get_policies_with_mappings'):
         del st.session_state.db_manager
         st.rerun()
 
@@ -30,10 +37,12 @@ if 'db_manager' not in st.session_state:
 db = st.session_state.db_manager
 db.render_sidebar_status()
 
-# Tabs
-tab_list, tab_create, tab_matrix = st.tabs(["📋 Policy List", "➕ Create Policy", "🕸️ Traceability Matrix"])
+# --- TAB BODIES ---
+# Each tab is a fragment: widget events inside one tab rerun only that tab,
+# so e.g. toggling a policy body does not re-query the matrix or NIST list.
 
-with tab_create:
+@st.fragment
+def render_create_tab(db):
     st.header("Define New Policy")
     with st.form("create_policy_form"):
         p_name = st.text_input("Policy Name", placeholder="e.g. Access Control Policy")
@@ -58,34 +67,23 @@ with tab_create:
             if not p_name:
                 st.error("Policy Name is required.")
             else:
-                success, msg = db.create_policy(p_name, p_cat, p_sum, p_content)
+                success, res = db.create_policy(p_name, p_cat, p_sum, p_content)
                 if success:
-                    # Get ID (hacky fetch last)
-                    # Ideally create_policy should return ID. 
-                    # Assuming lookup by name/recent for now or just creating.
-                    # Mapping:
-                    latest = db.execute(f"SELECT id FROM policies WHERE name='{p_name}' ORDER BY created_at DESC LIMIT 1", fetch=True)
-                    if latest:
-                        pid = latest[0]['id']
-                        if selected_nist:
-                            count = 0
-                            for label in selected_nist:
-                                nid = nist_options[label]
-                                db.link_policy_to_nist(pid, nid)
-                                count += 1
-                            st.success(f"✅ Policy Created and mapped to {count} controls!")
-                        else:
-                            st.success("✅ Policy Created (No mappings).")
+                    pid = res # New policy id
+                    if selected_nist:
+                        db.link_policies_to_nist_bulk(pid, [nist_options[l] for l in selected_nist])
+                        st.session_state.pm_flash = f"✅ Policy Created and mapped to {len(selected_nist)} controls!"
                     else:
-                        st.success("✅ Policy Created.")
+                        st.session_state.pm_flash = "✅ Policy Created (No mappings)."
                         
-                    time.sleep(1)
                     st.rerun()
                 else:
-                    st.error(f"Failed: {msg}")
+                    st.error(f"Failed: {res}")
 
-with tab_list:
-    policies = db.get_policies()
+@st.fragment
+def render_list_tab(db):
+    # Policies and their mapped control ids in one query (no per-policy lookup)
+    policies = db.get_policies_with_mappings()
     if not policies:
         st.info("No Policies Defined. Go to 'Create Policy' to start.")
     else:
@@ -94,28 +92,43 @@ with tab_list:
                 st.caption(f"ID: {p['id']} | Created: {p['created_at']}")
                 st.markdown(f"**Summary:** {p['summary']}")
                 st.divider()
-                st.markdown(p['content'])
+                # Policy body is fetched on demand to keep the list query light
+                if st.toggle("Show Full Policy", key=f"show_policy_{p['id']}"):
+                    st.markdown(db.get_policy_content(p['id']))
                 
                 # Show Mappings
-                mappings = db.get_policy_mappings(p['id'])
-                if mappings:
+                if p['mappings']:
                     st.markdown("#### ✅ Mapped Controls")
-                    st.write([m['nist_control_id'] for m in mappings])
+                    st.write(p['mappings'])
 
-with tab_matrix:
+@st.fragment
+def render_matrix_tab(db):
     st.header("Traceability Matrix")
     st.caption("Visualizing coverage of NIST Controls by Policies.")
     
     # Simple Matrix
     if st.button("Generate Matrix"):
-        # Get all mappings
-        all_maps = db.execute("SELECT * FROM policy_nist_mappings", fetch=True)
-        if all_maps:
-            df = pd.DataFrame(all_maps)
+        # Coverage is aggregated server-side: one row per mapped control
+        cov = db.execute(
+            "SELECT nist_control_id, COUNT(*) AS policies FROM policy_nist_mappings "
+            "GROUP BY nist_control_id ORDER BY nist_control_id",
+            fetch=True
+        )
+        if cov:
+            df = pd.DataFrame(cov).set_index('nist_control_id')
             st.dataframe(df, use_container_width=True)
-            
-            # Group by NIST
-            cov = df.groupby('nist_control_id').count()
-            st.bar_chart(cov)
+            st.bar_chart(df)
         else:
             st.warning("No mappings found.")
+
+# Tabs
+tab_list, tab_create, tab_matrix = st.tabs(["📋 Policy List", "➕ Create Policy", "🕸️ Traceability Matrix"])
+
+with tab_list:
+    render_list_tab(db)
+
+with tab_create:
+    render_create_tab(db)
+
+with tab_matrix:
+    render_matrix_tab(db)
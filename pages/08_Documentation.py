@@ -12,15 +12,61 @@ documenting everything from the hierarchical data model to the live database sch
 Maintain operational consistency by following these standardized procedures.
 """)
 
+@st.cache_data(show_spinner=False)
+def _read_file_cached(filename, mtime):
+    # mtime is part of the cache key, so an edited file is re-read automatically
+    with open(filename, "r", encoding="utf-8") as f:
+        return f.read()
+
 def read_file(filename):
-    """Reads a markdown file from the root directory."""
+    """Reads a markdown file from the root directory (cached until it changes)."""
     if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            return f.read()
+        return _read_file_cached(filename, os.path.getmtime(filename))
     return f"⚠️ Error: `{filename}` not found."
 
 from database_manager import DatabaseManager
 
+# --- CACHED SCHEMA INSPECTION ---
+# Schema changes rarely, so table lists and column info are cached for 5 min,
+# keyed on mode (and table). `_db` is passed unhashed. Errors are not cached.
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _list_tables(_db, mode):
+    if mode == "CLOUD":
+        conn = _db._get_cloud_conn()
+        sql = "SHOW TABLES"
+    else:
+        conn = _db._get_local_conn()
+        sql = "SELECT name FROM sqlite_master WHERE type='table'"
+    try:
+        cur = conn.cursor()
+        cur.execute(sql)
+        return [t[0] for t in cur.fetchall()]
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _describe_table(_db, mode, table):
+    # Table name is bound as a parameter, never interpolated into the SQL
+    if mode == "CLOUD":
+        conn = _db._get_cloud_conn()
+        sql = (
+            "SELECT COLUMN_NAME, COLUMN_TYPE, COLUMN_KEY, EXTRA FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s ORDER BY ORDINAL_POSITION"
+        )
+    else:
+        conn = _db._get_local_conn()
+        sql = "SELECT name, type, pk FROM pragma_table_info(?) ORDER BY cid"
+    try:
+        cur = conn.cursor()
+        cur.execute(sql, (table,))
+        rows = cur.fetchall()
+    finally:
+        conn.close()
+    if mode == "CLOUD":
+        return [{"Column": r[0], "Type": r[1], "Key": r[2], "Extra": r[3]} for r in rows]
+    return [{"Column": r[0], "Type": r[1], "PK": "Yes" if r[2] else ""} for r in rows]
+
 # Initialize Database Manager
 if 'db_manager' not in st.session_state:
     st.session_state.db_manager = DatabaseManager()
@@ -28,17 +74,18 @@ if 'db_manager' not in st.session_state:
 # Global Sidebar: Connectivity & Sync Controls
 st.session_state.db_manager.render_sidebar_status()
 
-# Create tabs for different documentation sources
-tab_guide, tab_walk, tab_user, tab_portal, tab_tech, tab_schema = st.tabs(["🔰 ITIL & ISO Primer", "🚀 Walkthrough", "📖 User Guide", "🌐 Self-Service Portal", "⚙️ Technical Specs", "🗄️ Live Schema"])
+# --- SECTIONS ---
+# Each section is a function; only the selected one runs on a rerun.
+# (st.tabs executes every tab body, including the schema DB queries.)
 
-with tab_guide:
+def render_guide():
     st.markdown(read_file("ITIL_GUIDE.md"))
     st.markdown(read_file("README.md"))
 
-with tab_tech:
+def render_tech():
     st.markdown(read_file("TECHNICAL_DOCS.md"))
 
-with tab_portal:
+def render_portal():
     st.header("🌐 Companion App / Self-Service Portal")
     st.info("A separate light-weight web portal is available for end-users to submit tickets and view knowledge base articles without accessing this admin console.")
     
@@ -55,7 +102,7 @@ with tab_portal:
     - **Logs**: `journalctl -u companion.service -f`
     """)
 
-with tab_walk:
+def render_walkthrough():
     # Attempt to read from Artifacts if local file not present, or fallback
     # Since we saved walkthrough.md in Brain, we might need to copy it or read absolute.
     # For now, let's assume we want to read the local copy if we move it there, 
@@ -64,52 +111,21 @@ with tab_walk:
     # Let's try reading a local "WALKTHROUGH.md" and I'll copy the artifact content there.
     st.markdown(read_file("WALKTHROUGH.md"))
 
-with tab_schema:
+def render_schema():
     st.subheader("Live Database Schema")
     st.caption("Inspect the current structure of the connected database.")
     
     if 'db_manager' in st.session_state:
         db = st.session_state.db_manager
         
-        # Get tables based on mode
-        tables = []
         try:
-            if db.mode == "CLOUD":
-                conn = db._get_cloud_conn()
-                cur = conn.cursor()
-                cur.execute("SHOW TABLES")
-                tables = [t[0] for t in cur.fetchall()]
-                conn.close()
-            else:
-                conn = db._get_local_conn()
-                cur = conn.cursor()
-                cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                tables = [t[0] for t in cur.fetchall()]
-                conn.close()
-                
+            tables = _list_tables(db, db.mode)
+            
             if tables:
                 selected_table = st.selectbox("Select Table to Inspect", tables)
                 
-                if selected_table:
-                    # Fetch columns/schema info
-                    schema_data = []
-                    if db.mode == "CLOUD":
-                        conn = db._get_cloud_conn()
-                        cur = conn.cursor()
-                        cur.execute(f"DESCRIBE {selected_table}")
-                        rows = cur.fetchall()
-                        # MySQL Describe: Field, Type, Null, Key, Default, Extra
-                        schema_data = [{"Column": r[0], "Type": r[1], "Key": r[3], "Extra": r[5]} for r in rows]
-                        conn.close()
-                    else:
-                        conn = db._get_local_conn()
-                        cur = conn.cursor()
-                        cur.execute(f"PRAGMA table_info({selected_table})")
-                        rows = cur.fetchall()
-                        # SQLite Pragma: cid, name, type, notnull, dflt_value, pk
-                        schema_data = [{"Column": r[1], "Type": r[2], "PK": "Yes" if r[5] else ""} for r in rows]
-                        conn.close()
-                        
+                if selected_table in tables:
+                    schema_data = _describe_table(db, db.mode, selected_table)
                     st.dataframe(schema_data, use_container_width=True)
             else:
                 st.warning("No tables found.")
@@ -117,3 +133,22 @@ with tab_schema:
             st.error(f"Could not fetch schema: {e}")
     else:
         st.warning("Database Manager not initialized. Please visit the Home page first.")
+
+# Section picker for the different documentation sources
+section = st.radio(
+    "Section",
+    ["🔰 ITIL & ISO Primer", "🚀 Walkthrough", "📖 User Guide", "🌐 Self-Service Portal", "⚙️ Technical Specs", "🗄️ Live Schema"],
+    horizontal=True,
+    label_visibility="collapsed"
+)
+
+if section == "🔰 ITIL & ISO Primer":
+    render_guide()
+elif section == "🚀 Walkthrough":
+    render_walkthrough()
+elif section == "🌐 Self-Service Portal":
+    render_portal()
+elif section == "⚙️ Technical Specs":
+    render_tech()
+elif section == "🗄️ Live Schema":
+    render_schema()
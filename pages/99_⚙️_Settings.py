@@ -6,7 +6,6 @@ import database_manager
 importlib.reload(database_manager)
 from database_manager import DatabaseManager
 import os
-import time
 import mysql.connector
 
 # =============================================================================
@@ -51,6 +50,11 @@ def save_toml(path, data):
 
 st.set_page_config(page_title="Settings", page_icon="⚙️", layout="wide")
 
+# One-shot notice queued by an action before its rerun (no blocking sleep)
+set_flash = st.session_state.pop('set_flash', None)
+if set_flash:
+    st.toast(set_flash)
+
 st.title("⚙️ Settings")
 st.info("""
 **Global System Governance**
@@ -111,11 +115,10 @@ with c1:
                     # Swap
                     data["mysql"], data["mysql_backup"] = data["mysql_backup"], data["mysql"]
                     save_toml(secrets_path, data)
-                    st.success("Configuration Swapped! Reloading...")
+                    st.session_state.set_flash = "Configuration Swapped! Reloaded."
                     # Critical: Fully reset DB manager to pick up new config on init
                     if 'db_manager' in st.session_state:
                         del st.session_state.db_manager
-                    time.sleep(1)
                     st.rerun()
                 else:
                     st.error("Cannot swap: Missing [mysql] or [mysql_backup] sections.")
@@ -371,8 +374,7 @@ with st.spinner("Checking VPS User Database..."):
                         if st.button("🗑️", key=f"del_{u['username']}", help="Delete User"):
                             success, msg = st.session_state.db_manager.delete_companion_user(u['username'])
                             if success:
-                                st.success(f"Deleted")
-                                time.sleep(1)
+                                st.session_state.set_flash = f"Deleted {u['username']}"
                                 st.rerun()
                     else:
                         st.caption("Protected")
@@ -412,8 +414,7 @@ with st.spinner("Checking VPS User Database..."):
                     full_name = f"{new_first} {new_last}".strip()
                     success, msg = st.session_state.db_manager.add_companion_user(new_user, new_pass, new_role, full_name)
                     if success:
-                        st.success(msg)
-                        time.sleep(1)
+                        st.session_state.set_flash = msg
                         st.rerun()
                     else:
                         st.error(msg)
@@ -446,8 +447,7 @@ with st.spinner("Checking VPS User Database..."):
                             # Success - Update Manager
                             st.session_state.db_manager.mode = "CLOUD"
                             st.session_state.db_manager.status_msg = "🟢 Cloud Connected (Restored)"
-                            st.success("✅ Connected Successfully! Reloading...")
-                            time.sleep(1)
+                            st.session_state.set_flash = "✅ Connected Successfully!"
                             st.rerun()
                 except Exception as e:
                     st.error(f"❌ Connection Failed: {str(e)}")
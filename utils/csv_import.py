@@ -0,0 +1,63 @@
+"""
+Shared helpers for the bulk CSV importers (import_machines.py, import_software.py).
+Each importer keeps its own clean_rows(df); the column cleaning, chunked
+read-ahead and batch sizes live here.
+"""
+import queue
+import threading
+import pandas as pd
+
+BATCH_SIZE = 1000 # Rows per executemany call
+CHUNK_ROWS = 50_000 # Rows parsed per CSV chunk
+QUEUE_DEPTH = 4 # Cleaned chunks buffered ahead of the inserts
+
+def clean_column(df, column):
+    """
+    Returns `column` as stripped strings for every row at once, with missing
+    columns, NaN and 'nan'/'None' cells normalised to ''.
+    """
+    if column not in df:
+        return pd.Series("", index=df.index)
+    values = df[column].fillna("").str.strip() # dtype=str: already text, no astype copy
+    return values.mask(values.isin(["nan", "None"]), "")
+
+def cleaned_chunks(chunks, clean_rows):
+    """
+    Yields clean_rows(chunk) for each CSV chunk. Parsing + cleaning run in a
+    background thread, so the next chunk is prepared while the caller is
+    still inserting the previous one (bounded by QUEUE_DEPTH).
+    Closing the generator (or an error in the caller's loop) stops the producer.
+    """
+    pending = queue.Queue(maxsize=QUEUE_DEPTH)
+    stop = threading.Event()
+
+    def put(item):
+        # Bounded wait so a consumer that gave up never leaves us blocked on a full queue
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(clean_rows(chunk)):
+                    return
+        except Exception as e:
+            put(e) # Re-raised on the consuming side
+        put(None)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while True:
+            rows = pending.get()
+            if rows is None:
+                return
+            if isinstance(rows, Exception):
+                raise rows
+            yield rows
+    finally:
+        stop.set()